@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of cached entries changes so stale entries are ignored
+CACHE_VERSION = 2
+
+CacheEntry = Dict[str, Any]
+
+# File in CACHE_DIR whose mtime records the last prune (see prune_if_due)
+PRUNE_STAMP = 'last-prune'
+
+# Set once the cache has been reported unusable, so it is only reported once
+_unavailable_reported = False
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Builds a stable cache key from JSON-serialisable parts.
+
+    Args:
+        *parts (Any): Values that together identify the cached item.
+
+    Returns:
+        str: A hex SHA-256 digest of the parts.
+    """
+    payload = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cache_path(kind: str, key: str, suffix: str) -> str:
+    """
+    Returns the on-disk location of a cache item, creating its directory.
+
+    Items are sharded by the first two characters of the key to keep
+    directories small.
+
+    Args:
+        kind (str): The cache namespace, e.g. 'pages' or 'images'.
+        key (str): The key returned by make_key.
+        suffix (str): File extension including the dot, e.g. '.json'.
+
+    Returns:
+        str: Absolute path of the cache file.
+
+    Raises:
+        OSError: If the cache directory cannot be created, e.g. because
+            config.CACHE_DIR is not writable. Callers should then go on
+            without the cache (see warn_unavailable).
+    """
+    folder = os.path.join(config.CACHE_DIR, kind, key[:2])
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, key + suffix)
+
+
+def load_entry(kind: str, key: str) -> Optional[CacheEntry]:
+    """
+    Loads a JSON cache entry.
+
+    Args:
+        kind (str): The cache namespace.
+        key (str): The key returned by make_key.
+
+    Returns:
+        Optional[CacheEntry]: The stored entry, or None if missing or unreadable.
+    """
+    try:
+        path = cache_path(kind, key, '.json')
+        with open(path, 'r', encoding='utf-8') as fh:
+            entry = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    touch(path)
+    return entry
+
+
+def touch(path: str) -> None:
+    """
+    Marks a cache file as recently used, so that prune keeps it.
+
+    Args:
+        path (str): Path of the cache file.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass  # Pruned or unwritable; the next store recreates it
+
+
+def store_entry(kind: str, key: str, entry: CacheEntry) -> None:
+    """
+    Stores a JSON cache entry atomically. Failures are reported (once, see
+    warn_unavailable) and ignored, since the cache is only an optimisation.
+
+    Args:
+        kind (str): The cache namespace.
+        key (str): The key returned by make_key.
+        entry (CacheEntry): JSON-serialisable data to store.
+    """
+    try:
+        path = cache_path(kind, key, '.json')
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(entry, fh)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        warn_unavailable(e)
+
+
+def warn_unavailable(error: OSError) -> None:
+    """
+    Reports that the cache cannot be used. Only the first call in a process
+    logs, so a broken cache directory doesn't produce a message per page.
+
+    Args:
+        error (OSError): The error raised by the cache operation.
+    """
+    global _unavailable_reported
+    if not _unavailable_reported:
+        _unavailable_reported = True
+        logger.warning("Cache unavailable, continuing without it: %s", error)
+
+
+def prune(max_bytes: Optional[int] = None, max_age_days: Optional[float] = None) -> int:
+    """
+    Deletes cache files that have not been used for `max_age_days`, then the
+    least recently used ones until the cache fits in `max_bytes`.
+
+    Files are aged by their modification time, which load_entry and touch
+    refresh on every cache hit. Failures are logged and ignored.
+
+    Args:
+        max_bytes (Optional[int]): Size cap. Defaults to config.CACHE_MAX_BYTES.
+        max_age_days (Optional[float]): Age cap. Defaults to config.CACHE_MAX_AGE_DAYS.
+
+    Returns:
+        int: Number of files deleted.
+    """
+    max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    max_age_days = config.CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    cutoff = time.time() - max_age_days * config.SECONDS_PER_DAY
+
+    files: List[Tuple[float, int, str]] = []
+    for folder, _, names in os.walk(config.CACHE_DIR):
+        for name in names:
+            if name == PRUNE_STAMP and folder == config.CACHE_DIR:
+                continue
+            path = os.path.join(folder, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if '.tmp' in name and stat.st_mtime >= cutoff:
+                continue  # Probably still being written
+            files.append((stat.st_mtime, stat.st_size, path))
+
+    files.sort()  # Least recently used first
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for mtime, size, path in files:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning("Failed to prune cache file %s: %s", path, e)
+            continue
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def prune_if_due(interval: Optional[float] = None) -> int:
+    """
+    Prunes the cache unless it was pruned less than `interval` seconds ago.
+
+    Pruning stats every cache file, so builds call this rather than prune:
+    the time of the last prune is kept as the mtime of a stamp file, and
+    checking it costs a single stat. The stamp is renewed before pruning, so
+    concurrent builds don't prune at the same time.
+
+    Args:
+        interval (Optional[float]): Minimum seconds between prunes.
+            Defaults to config.CACHE_PRUNE_INTERVAL.
+
+    Returns:
+        int: Number of files deleted (0 if pruning was not due).
+    """
+    interval = config.CACHE_PRUNE_INTERVAL if interval is None else interval
+    stamp = os.path.join(config.CACHE_DIR, PRUNE_STAMP)
+    try:
+        if time.time() - os.path.getmtime(stamp) < interval:
+            return 0
+    except OSError:
+        pass  # Never pruned
+    try:
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        with open(stamp, 'w'):
+            pass
+    except OSError as e:
+        warn_unavailable(e)
+        return 0
+    return prune()
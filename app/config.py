@@ -1,22 +1,110 @@
 # app/config.py
 import os
-
-from reportlab.lib.pagesizes import HALF_LETTER, LETTER, landscape
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 # Environment-based config
 USER_NAME = os.environ.get('USER') or os.environ.get(
     'LOGNAME') or os.environ.get('USERNAME')
 DOWNLOADS_FOLDER = os.path.expanduser('~/Downloads')
 
-# PDF dimensions and settings
-HALF_WIDTH, HALF_HEIGHT = HALF_LETTER
-LANDSCAPE_WIDTH, LANDSCAPE_HEIGHT = landscape(LETTER)
+# Seconds in a day, for settings and ages given in days
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# PDF dimensions and settings, in points. These are ReportLab's HALF_LETTER and
+# landscape(LETTER), spelled out so that loading the config doesn't import ReportLab.
+HALF_WIDTH, HALF_HEIGHT = 396.0, 576.0
+LANDSCAPE_WIDTH, LANDSCAPE_HEIGHT = 792.0, 612.0
 MARGIN = 10
 PIXEL_SIZE = 40
 TITLE_TEXT_LENGTH = 50
 BOOKLET_PDF_PATH = os.path.join(os.path.sep, 'tmp', 'Booklet.pdf')
 TEMP_PIXELATED_PATH = os.path.join(os.path.sep, 'tmp', 'temp_pixelated.jpg')
 
+# Persistent cache of rendered pages and pixelated images, reused across editions
+CACHE_DIR = os.path.expanduser('~/.cache/downloads_editions')
+USE_PAGE_CACHE = True
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # least recently used entries are pruned beyond this
+CACHE_MAX_AGE_DAYS = 90  # entries unused for longer are pruned
+CACHE_PRUNE_INTERVAL = 60 * 60  # seconds; builds prune the cache at most this often
+
+# Guardrails against decompression bombs and huge or corrupt images
+MAX_IMAGE_FILE_SIZE = 64 * 1024 * 1024  # bytes; larger files are skipped
+MAX_IMAGE_PIXELS = 40_000_000  # pixels decoded after any reduced-resolution decode
+
+# Budgets for extracting previews of non-image files (PDF pages, video frames, ...)
+PREVIEW_TIME_BUDGET = 10  # seconds per file
+PREVIEW_MEMORY_BUDGET = 512 * 1024 * 1024  # bytes of address space per file
+
+# Output profiles trade encode time against file size:
+#   page_compression  Flate-compress page content streams (ReportLab's on/off switch)
+#   image_format      'JPEG' (lossy, DCT) or 'PNG' (lossless, Flate) for pixelated images
+#   jpeg_quality      JPEG quality, 1-95
+#   palette_colors    Quantize PNG mosaics to an indexed palette of this many colours (0 = off)
+#   max_image_size    Cap on the longest side of an embedded image, in pixels
+#   share_resources   Embed each image once as a shared XObject instead of inline per page
+OUTPUT_PROFILES = {
+    'fast-preview': {
+        'page_compression': 0,
+        'image_format': 'JPEG',
+        'jpeg_quality': 50,
+        'palette_colors': 0,
+        'max_image_size': 600,
+        'share_resources': False,
+    },
+    'print': {
+        'page_compression': 1,
+        'image_format': 'JPEG',
+        'jpeg_quality': 90,
+        'palette_colors': 0,
+        'max_image_size': 2400,
+        'share_resources': True,
+    },
+    'archive': {
+        'page_compression': 1,
+        'image_format': 'PNG',
+        'jpeg_quality': 90,
+        'palette_colors': 64,
+        'max_image_size': 1200,
+        'share_resources': True,
+    },
+}
+OUTPUT_PROFILE = 'print'
+
+# Watch mode (--watch): regenerate once changes have been quiet this long
+WATCH_DEBOUNCE = 5  # seconds
+WATCH_POLL_INTERVAL = 2  # seconds between folder mtime checks without inotify
+
 # Other settings
 NUMBER_OF_FILES = 24
 DRAW_IMAGES = False  # Set to True to include pixelated images in the PDF
+
+
+@dataclass
+class BuildConfig:
+    """
+    Settings of a single booklet build.
+
+    Each field defaults to the matching module-level setting above at the time
+    the object is created, so builds with different settings can run side by
+    side without touching the module globals.
+    """
+    downloads_folder: str = field(default_factory=lambda: DOWNLOADS_FOLDER)
+    number_of_files: int = field(default_factory=lambda: NUMBER_OF_FILES)
+    draw_images: bool = field(default_factory=lambda: DRAW_IMAGES)
+    pixel_size: int = field(default_factory=lambda: PIXEL_SIZE)
+    title_text_length: int = field(default_factory=lambda: TITLE_TEXT_LENGTH)
+    margin: float = field(default_factory=lambda: MARGIN)
+    half_width: float = field(default_factory=lambda: HALF_WIDTH)
+    half_height: float = field(default_factory=lambda: HALF_HEIGHT)
+    landscape_width: float = field(default_factory=lambda: LANDSCAPE_WIDTH)
+    landscape_height: float = field(default_factory=lambda: LANDSCAPE_HEIGHT)
+    output_path: str = field(default_factory=lambda: BOOKLET_PDF_PATH)
+    output_profile: str = field(default_factory=lambda: OUTPUT_PROFILE)
+    use_page_cache: bool = field(default_factory=lambda: USE_PAGE_CACHE)
+    user_name: Optional[str] = field(default_factory=lambda: USER_NAME)
+
+    @property
+    def profile(self) -> Dict[str, Any]:
+        """The settings of the selected output profile."""
+        return OUTPUT_PROFILES[self.output_profile]
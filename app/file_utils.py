@@ -1,113 +1,397 @@
+import bisect
 import os
 import random
 import subprocess
 import sys
+import time
+from array import array
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional
 
+from app import config
+from app.progress import Progress
 
-def get_sample_files(
-    folder_path: str,
-    number_of_files: int,
-    ignore_extensions: Optional[List[str]] = None
-) -> List[str]:
+# How many directory entries to scan between progress reports
+SCAN_REPORT_INTERVAL = 256
+
+# Extension classes used for stratified sampling; anything else is 'other'
+EXTENSION_CLASSES = {
+    'image': {'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'heic', 'tif', 'tiff', 'svg'},
+    'document': {'pdf', 'doc', 'docx', 'txt', 'rtf', 'md', 'odt', 'pages', 'epub'},
+    'spreadsheet': {'xls', 'xlsx', 'csv', 'numbers', 'ods'},
+    'presentation': {'ppt', 'pptx', 'key', 'odp'},
+    'video': {'mp4', 'mov', 'm4v', 'mkv', 'webm', 'avi'},
+    'audio': {'mp3', 'wav', 'm4a', 'aac', 'flac', 'ogg'},
+    'archive': {'zip', 'tar', 'gz', 'tgz', 'rar', '7z', 'bz2', 'xz'},
+    'installer': {'dmg', 'pkg', 'exe', 'msi', 'deb', 'rpm', 'appimage'},
+}
+
+# Upper bounds (bytes) and labels of the size buckets used for stratified sampling
+SIZE_BUCKETS = [
+    (100 * 1024, '<100KB'),
+    (1024 * 1024, '100KB-1MB'),
+    (10 * 1024 * 1024, '1-10MB'),
+    (100 * 1024 * 1024, '10-100MB'),
+    (float('inf'), '>100MB'),
+]
+
+# Files lose half their weight in 'recent' sampling for every this many days of age
+RECENT_HALF_LIFE_DAYS = 30
+
+SAMPLING_STRATEGIES = ['uniform', 'extension', 'month', 'size', 'recent']
+
+
+def extension_class(extension: str) -> str:
     """
-    Returns a random sample of file paths from the specified folder, excluding files with certain extensions.
+    Returns the extension class of a file extension (e.g. 'png' -> 'image').
 
     Args:
-        folder_path (str): Path to the folder containing files.
-        number_of_files (int): Number of files to sample.
-        ignore_extensions (Optional[List[str]]): List of file extensions to ignore.
-            Defaults to ['.DS_Store', '.ini'].
+        extension (str): Lower-case extension without the dot.
 
     Returns:
-        List[str]: A list of sampled file paths. Returns an empty list if no files are found.
+        str: The class name, or 'other'.
     """
-    if ignore_extensions is None:
-        ignore_extensions = ['.DS_Store', '.ini']
+    for name, extensions in EXTENSION_CLASSES.items():
+        if extension in extensions:
+            return name
+    return 'other'
 
-    try:
-        all_files = os.listdir(folder_path)
-    except Exception as e:
-        print(f"Error reading folder '{folder_path}': {e}")
-        return []
 
-    files = [
-        os.path.join(folder_path, f)
-        for f in all_files
-        if os.path.isfile(os.path.join(folder_path, f)) and not any(f.endswith(ext) for ext in ignore_extensions)
-    ]
+def size_bucket(size: int) -> str:
+    """
+    Returns the label of the size bucket a file size falls into.
 
-    if not files:
-        print('No files found in the specified folder.')
-        return []
+    Args:
+        size (int): File size in bytes.
+
+    Returns:
+        str: The bucket label.
+    """
+    for upper_bound, label in SIZE_BUCKETS:
+        if size < upper_bound:
+            return label
+    return SIZE_BUCKETS[-1][1]
+
+
+class FolderIndex:
+    """
+    A single-pass index of the files in a folder.
+
+    The scan stores one row per file (path, size, mtime, extension) and, in the
+    same pass, groups the rows into the strata used for sampling: extension
+    class, month modified and size bucket. Sizes, mtimes and extension codes
+    are kept in typed arrays so they can be copied into NumPy columns cheaply
+    (see stats_utils). Drawing a sample afterwards never
+    lists or filters the folder again, so many sample variants of one folder
+    each cost O(k).
+    """
+
+    def __init__(
+        self,
+        folder_path: str,
+        ignore_extensions: Optional[List[str]] = None,
+        progress: Optional[Progress] = None
+    ) -> None:
+        """
+        Scans the folder.
+
+        Args:
+            folder_path (str): Path to the folder containing files.
+            ignore_extensions (Optional[List[str]]): List of file extensions to ignore.
+                Defaults to ['.DS_Store', '.ini'].
+            progress (Optional[Progress]): Receives 'scan' events and may cancel the scan.
+
+        Raises:
+            OSError: If the folder cannot be read.
+            GenerationCancelled: If cancellation is requested through `progress`.
+        """
+        self.folder_path = folder_path
+        self.ignore_extensions = ['.DS_Store', '.ini'] if ignore_extensions is None else ignore_extensions
+        self.paths: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.extensions: List[str] = []
+        # Each distinct extension gets a small integer code, in order of first sight
+        self.extension_codes = array('q')
+        self.extension_names: List[str] = []
+        self._extension_lookup: Dict[str, int] = {}
+        self.strata: Dict[str, Dict[str, List[int]]] = {
+            'extension': {}, 'month': {}, 'size': {}}
+        self._recent_weights: Optional[List[float]] = None
+
+        with os.scandir(folder_path) as it:
+            entries = list(it)
+
+        for idx, entry in enumerate(entries):
+            if progress is not None and idx % SCAN_REPORT_INTERVAL == 0:
+                progress.update('scan', idx, len(entries))
+            if self.is_ignored(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue  # Vanished or unreadable since listing
+            self._add_row(entry.path, entry.name, stat.st_size, stat.st_mtime)
+
+        if progress is not None:
+            progress.update('scan', len(entries), len(entries))
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def is_ignored(self, name: str) -> bool:
+        """Checks whether a file name ends with one of the ignored extensions."""
+        return any(name.endswith(ext) for ext in self.ignore_extensions)
+
+    def _strata_keys(self, row: int) -> Dict[str, str]:
+        """Returns the stratum of a row for each stratified strategy."""
+        return {
+            'extension': extension_class(self.extensions[row]),
+            'month': datetime.fromtimestamp(self.mtimes[row]).strftime('%Y-%m'),
+            'size': size_bucket(self.sizes[row]),
+        }
 
-    return random.sample(files, min(number_of_files, len(files)))
+    def _add_row(self, path: str, name: str, size: int, mtime: float) -> None:
+        """Appends a file to the table and to its strata."""
+        row = len(self.paths)
+        extension = os.path.splitext(name)[1][1:].lower()
+        self.paths.append(path)
+        self.rows[path] = row
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.extensions.append(extension)
+        code = self._extension_lookup.get(extension)
+        if code is None:
+            code = self._extension_lookup[extension] = len(self.extension_names)
+            self.extension_names.append(extension)
+        self.extension_codes.append(code)
 
+        for strategy, key in self._strata_keys(row).items():
+            self.strata[strategy].setdefault(key, []).append(row)
 
-def analyze_files_by_creation_date(
+    def remove_file(self, path: str) -> bool:
+        """
+        Removes a file from the index.
+
+        The last row is moved into the freed slot, so removal costs O(stratum size)
+        rather than rebuilding the table.
+
+        Args:
+            path (str): The file path as stored in the index.
+
+        Returns:
+            bool: True if the file was indexed.
+        """
+        row = self.rows.pop(path, None)
+        if row is None:
+            return False
+        last = len(self.paths) - 1
+
+        for strategy, key in self._strata_keys(row).items():
+            stratum = self.strata[strategy][key]
+            stratum.remove(row)
+            if not stratum:
+                del self.strata[strategy][key]
+        if row != last:
+            for strategy, key in self._strata_keys(last).items():
+                stratum = self.strata[strategy][key]
+                stratum[stratum.index(last)] = row
+            self.paths[row] = self.paths[last]
+            self.rows[self.paths[row]] = row
+            for column in (self.sizes, self.mtimes, self.extensions, self.extension_codes):
+                column[row] = column[last]
+
+        for column in (self.paths, self.sizes, self.mtimes, self.extensions, self.extension_codes):
+            column.pop()
+        self._recent_weights = None
+        return True
+
+    def refresh_file(self, name: str) -> None:
+        """
+        Applies a change to one directory entry: adds, updates or removes its row.
+
+        Args:
+            name (str): The entry name inside the indexed folder.
+        """
+        path = os.path.join(self.folder_path, name)
+        self.remove_file(path)
+        if self.is_ignored(name):
+            return
+        try:
+            if not os.path.isfile(path):
+                return
+            stat = os.stat(path)
+        except OSError:
+            return  # Deleted again before we got to it
+        self._add_row(path, name, stat.st_size, stat.st_mtime)
+        self._recent_weights = None
+
+    def histogram(self, strategy: str) -> Dict[str, int]:
+        """
+        Returns the number of files in each stratum.
+
+        Args:
+            strategy (str): One of 'extension', 'month' or 'size'.
+
+        Returns:
+            Dict[str, int]: File count per stratum.
+        """
+        return {key: len(rows) for key, rows in self.strata[strategy].items()}
+
+    def sample(
+        self,
+        number_of_files: int,
+        strategy: str = 'uniform',
+        rng: Optional[random.Random] = None
+    ) -> List[str]:
+        """
+        Draws a sample of file paths from the index.
+
+        Strategies:
+            'uniform'    every file is equally likely.
+            'extension'  stratified by extension class, proportional to the histogram.
+            'month'      stratified by month modified.
+            'size'       stratified by size bucket.
+            'recent'     weighted toward recently modified files (see RECENT_HALF_LIFE_DAYS).
+
+        Args:
+            number_of_files (int): Number of files to sample.
+            strategy (str): The sampling strategy.
+            rng (Optional[random.Random]): Random generator; defaults to the global one.
+
+        Returns:
+            List[str]: The sampled file paths (all files if fewer are indexed).
+
+        Raises:
+            ValueError: If the strategy is unknown.
+        """
+        # The random module's functions share its global (seedable) generator
+        rng = rng or random  # pyright: ignore[reportAssignmentType]
+        k = min(number_of_files, len(self.paths))
+
+        if strategy == 'uniform':
+            rows = rng.sample(range(len(self.paths)), k)
+        elif strategy in self.strata:
+            rows = self._sample_stratified(self.strata[strategy], k, rng)
+        elif strategy == 'recent':
+            rows = self._sample_recent(k, rng)
+        else:
+            raise ValueError(f"Unknown sampling strategy: {strategy}")
+
+        return [self.paths[row] for row in rows]
+
+    def _sample_stratified(self, strata: Dict[str, List[int]], k: int, rng: random.Random) -> List[int]:
+        """Allocates k across strata by largest remainder, then samples each stratum."""
+        total = sum(len(rows) for rows in strata.values())
+        if not total:
+            return []
+        quotas = {key: k * len(rows) / total for key, rows in strata.items()}
+        allocation = {key: int(quota) for key, quota in quotas.items()}
+        leftover = k - sum(allocation.values())
+        for key in sorted(quotas, key=lambda key: quotas[key] - allocation[key], reverse=True)[:leftover]:
+            allocation[key] += 1
+
+        rows: List[int] = []
+        for key, count in allocation.items():
+            rows.extend(rng.sample(strata[key], min(count, len(strata[key]))))
+        rng.shuffle(rows)
+        return rows
+
+    def _sample_recent(self, k: int, rng: random.Random) -> List[int]:
+        """Weighted sampling without replacement over cumulative recency weights."""
+        if self._recent_weights is None:
+            now = time.time()
+            half_life = RECENT_HALF_LIFE_DAYS * config.SECONDS_PER_DAY
+            cumulative = 0.0
+            self._recent_weights = []
+            for mtime in self.mtimes:
+                cumulative += 0.5 ** (max(0.0, now - mtime) / half_life)
+                self._recent_weights.append(cumulative)
+
+        weights = self._recent_weights
+        chosen: Dict[int, None] = {}
+        # Rejection of repeats stays cheap while k is small next to the folder
+        attempts = 0
+        while len(chosen) < k and attempts < 20 * k:
+            attempts += 1
+            row = bisect.bisect_right(weights, rng.random() * weights[-1])
+            chosen[min(row, len(weights) - 1)] = None
+        if len(chosen) < k:
+            # Weights too skewed to finish by rejection: top up uniformly
+            remaining = [row for row in range(len(weights)) if row not in chosen]
+            chosen.update(dict.fromkeys(rng.sample(remaining, k - len(chosen))))
+        return list(chosen)
+
+
+def get_sample_files(
     folder_path: str,
-    ignore_extensions: Optional[List[str]] = None
-) -> Optional[Tuple[Tuple[str, datetime], Tuple[str, datetime]]]:
+    number_of_files: int,
+    ignore_extensions: Optional[List[str]] = None,
+    progress: Optional[Progress] = None,
+    strategy: str = 'uniform'
+) -> List[str]:
     """
-    Scans the folder and returns the file with the earliest creation date and the file with the latest creation date.
+    Returns a random sample of file paths from the specified folder, excluding files with certain extensions.
 
     Args:
         folder_path (str): Path to the folder containing files.
+        number_of_files (int): Number of files to sample.
         ignore_extensions (Optional[List[str]]): List of file extensions to ignore.
             Defaults to ['.DS_Store', '.ini'].
+        progress (Optional[Progress]): Receives 'scan' events and may cancel the scan.
+        strategy (str): Sampling strategy, one of SAMPLING_STRATEGIES (see FolderIndex.sample).
 
     Returns:
-        Optional[Tuple[Tuple[str, datetime], Tuple[str, datetime]]]:
-            A tuple containing two tuples:
-                ((oldest_file_name, oldest_date), (recent_file_name, recent_date)).
-            Returns None if no files are found.
-    """
-    if ignore_extensions is None:
-        ignore_extensions = ['.DS_Store', '.ini']
+        List[str]: A list of sampled file paths. Returns an empty list if no files are found.
 
+    Raises:
+        GenerationCancelled: If cancellation is requested through `progress`.
+    """
     try:
-        all_files = os.listdir(folder_path)
-    except Exception as e:
+        index = FolderIndex(folder_path, ignore_extensions, progress)
+    except OSError as e:
         print(f"Error reading folder '{folder_path}': {e}")
-        return None
-
-    files = [
-        os.path.join(folder_path, f)
-        for f in all_files
-        if os.path.isfile(os.path.join(folder_path, f)) and not any(f.endswith(ext) for ext in ignore_extensions)
-    ]
+        return []
 
-    if not files:
+    if not len(index):
         print('No files found in the specified folder.')
-        return None
+        return []
 
-    oldest_file = min(files, key=os.path.getmtime)
-    recent_file = max(files, key=os.path.getmtime)
+    return index.sample(number_of_files, strategy)
 
-    oldest_date = datetime.fromtimestamp(os.path.getmtime(oldest_file))
-    recent_date = datetime.fromtimestamp(os.path.getmtime(recent_file))
 
-    return ((os.path.basename(oldest_file), oldest_date),
-            (os.path.basename(recent_file), recent_date))
+def launch_detached(command: List[str]) -> None:
+    """
+    Starts a command in its own session without waiting for it.
+
+    Args:
+        command (List[str]): The command and its arguments.
+    """
+    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
 
 
 def open_file_in_default_app(file_path: str) -> None:
     """
     Opens the specified file using the default application associated with its file type.
 
+    The viewer is launched in the background; this never waits for it, so a
+    missing or hanging opener (e.g. on a headless server) cannot block the caller.
+
     Args:
         file_path (str): Path to the file to open.
     """
     try:
         if sys.platform.startswith('darwin'):
-            subprocess.run(['open', file_path], check=True)
+            launch_detached(['open', file_path])
         elif os.name == 'nt':
             os.startfile(file_path)  # Windows
         elif os.name == 'posix':
-            subprocess.run(['xdg-open', file_path], check=True)
+            launch_detached(['xdg-open', file_path])
         else:
-            print(f"Unsupported operating system: cannot open file {
-                  file_path}")
+            print(f"Unsupported operating system: cannot open file {file_path}")
     except Exception as e:
         print(f"Failed to open file {file_path}: {e}")
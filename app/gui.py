@@ -1,9 +1,31 @@
+import multiprocessing
+import os
+import queue
 import sys
 import threading
 import tkinter as tk
 from tkinter import ttk
 
-from app import config, file_utils, pdf_utils
+# The PDF pipeline (ReportLab, Pillow, NumPy) is imported in the background
+# once the window is up; see preload_pipeline
+from app import file_utils
+from app.progress import GenerationCancelled, Progress, format_event
+
+# When set, the GUI prints a marker line once its first window is drawn and
+# exits (used by tools/measure_startup.py)
+STARTUP_PROBE_ENV = 'DOWNLOADS_EDITIONS_STARTUP_PROBE'
+STARTUP_PROBE_MARKER = 'first-window'
+
+
+def preload_pipeline():
+    """
+    Imports the PDF pipeline modules so the first generation doesn't wait
+    for them. Errors are left for the generation itself to report.
+    """
+    try:
+        from app import pdf_utils, stats_utils  # noqa: F401
+    except Exception:
+        pass
 
 
 class DownloadsEditionsGUI:
@@ -19,6 +41,9 @@ class DownloadsEditionsGUI:
         "the generated PDF with me at mail@alvinashiatey.com."
     )
 
+    # How often (ms) the main thread drains progress events from the worker
+    PROGRESS_POLL_MS = 100
+
     def __init__(self, root):
         self.root = root
         self.root.title("Downloads Publication")
@@ -34,10 +59,19 @@ class DownloadsEditionsGUI:
         # Variables
         self.is_generating = False
         self.status_var = tk.StringVar(value=self.ABOUT_TEXT)
+        self.progress = None
+        self.progress_queue = queue.Queue()
 
         # Setup UI
         self.setup_ui()
 
+        # Load the heavy modules once the window has been drawn
+        self.root.after_idle(self._start_preload)
+
+    def _start_preload(self):
+        """Import the PDF pipeline in a background thread (runs in main thread)."""
+        threading.Thread(target=preload_pipeline, daemon=True).start()
+
     def setup_ui(self):
         """Create and layout all UI elements."""
         main_frame = ttk.Frame(self.root)
@@ -60,6 +94,13 @@ class DownloadsEditionsGUI:
         )
         self.generate_btn.pack(expand=True)
 
+        self.cancel_btn = ttk.Button(
+            button_frame,
+            text="Cancel",
+            command=self.cancel_generation,
+            takefocus=False
+        )
+
         # Separator
         separator = ttk.Separator(main_frame, orient='horizontal')
         separator.grid(row=1, column=0, sticky="ew", padx=self.padding)
@@ -87,52 +128,97 @@ class DownloadsEditionsGUI:
 
         # Start generation in separate thread
         self.is_generating = True
+        self.progress = Progress(callback=self.progress_queue.put)
         self.generate_btn.config(state='disabled', text="Generating...")
+        self.cancel_btn.config(state='normal', text="Cancel")
+        self.cancel_btn.pack(pady=(0, self.padding // 2))
         self.status_var.set(
             "Generating your PDF...\n"
         )
 
         thread = threading.Thread(
-            target=self._generate_pdf_thread, daemon=True)
+            target=self._generate_pdf_thread, args=(self.progress,), daemon=True)
         thread.start()
+        self.root.after(self.PROGRESS_POLL_MS, self._poll_progress)
 
-    def _generate_pdf_thread(self):
+    def cancel_generation(self):
+        """Ask the worker thread to stop at its next progress check."""
+        if self.is_generating and self.progress is not None:
+            self.progress.cancel()
+            self.cancel_btn.config(state='disabled', text="Cancelling...")
+
+    def _poll_progress(self):
+        """Show the most recent progress event (runs in main thread)."""
+        latest = None
+        try:
+            while True:
+                latest = self.progress_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        if not self.is_generating:
+            return
+        if latest is not None and not self.progress.cancelled:
+            self.status_var.set(f"Generating your PDF...\n{format_event(latest)}")
+        self.root.after(self.PROGRESS_POLL_MS, self._poll_progress)
+
+    def _generate_pdf_thread(self, progress):
         """Worker thread for PDF generation."""
         try:
-            # Use default settings
-            folder = config.DOWNLOADS_FOLDER
-            num_files = config.NUMBER_OF_FILES
+            # Waits for the background preload if it is still running
+            from app import pdf_utils, stats_utils
 
-            # Get sample files
-            files = file_utils.get_sample_files(folder, num_files)
+            # Use default settings, captured for this run
+            builder = pdf_utils.BookletBuilder()
+            folder = builder.config.downloads_folder
+            num_files = builder.config.number_of_files
 
-            if not files:
+            # Scan once for both the sample and the about page statistics
+            index = file_utils.FolderIndex(folder, progress=progress)
+
+            if not len(index):
                 self.root.after(0, self._generation_error,
                                 "No files found in the Downloads folder")
                 return
 
+            # Get sample files
+            files = index.sample(num_files)
+
             # Create PDF
-            pdf_utils.create_booklet_pdf(files)
+            builder.build(files, progress=progress, stats=stats_utils.folder_stats(index))
 
             # Success
             self.root.after(0, self._generation_complete)
 
+        except GenerationCancelled:
+            self.root.after(0, self._generation_cancelled)
+
         except Exception as e:
             error_msg = str(e)
             self.root.after(0, self._generation_error, error_msg)
 
-    def _generation_complete(self):
-        """Called when PDF generation is complete (runs in main thread)."""
+    def _reset_buttons(self):
+        """Restore the idle button state (runs in main thread)."""
         self.is_generating = False
+        self.progress = None
         self.generate_btn.config(state='normal', text="Generate PDF")
+        self.cancel_btn.pack_forget()
+
+    def _generation_complete(self):
+        """Called when PDF generation is complete (runs in main thread)."""
+        self._reset_buttons()
         self.status_var.set(
             f"{self.ABOUT_TEXT}"
         )
 
+    def _generation_cancelled(self):
+        """Called when PDF generation was cancelled (runs in main thread)."""
+        self._reset_buttons()
+        self.status_var.set("Generation cancelled. No PDF was written.")
+
     def _generation_error(self, error_msg):
         """Called when PDF generation fails (runs in main thread)."""
-        self.is_generating = False
-        self.generate_btn.config(state='normal', text="Generate PDF")
+        self._reset_buttons()
         self.status_var.set(
             f"Failed to generate PDF:\n{error_msg}"
         )
@@ -151,8 +237,22 @@ def main():
 
     # Create and run app
     DownloadsEditionsGUI(root)
+
+    if os.environ.get(STARTUP_PROBE_ENV):
+        # Report once the window is actually mapped, not from an idle
+        # callback that can run before mapping (and after the preload)
+        def report_first_window(event):
+            if event.widget is not root:
+                return  # children share the toplevel's bindings
+            root.update_idletasks()  # finish drawing the widgets
+            print(STARTUP_PROBE_MARKER, flush=True)
+            root.destroy()
+        root.bind('<Map>', report_first_window)
+
     root.mainloop()
 
 
 if __name__ == '__main__':
+    # Preview workers are spawned; in a frozen executable they start here
+    multiprocessing.freeze_support()
     main()
@@ -1,23 +1,191 @@
+import os
+import threading
+from typing import Optional, Tuple
+
 from PIL import Image, ImageEnhance
-from app import config
+from app import cache_utils, config
+
+
+class ImageSkipped(Exception):
+    """Raised when an image is not pixelated because it breaks a guardrail."""
+
+
+def capped_size(width: int, height: int, max_size: int) -> Tuple[int, int]:
+    """
+    Scales the dimensions down so the longest side is at most max_size.
+
+    Args:
+            width (int): The original width.
+            height (int): The original height.
+            max_size (int): The maximum length of the longest side.
+
+    Returns:
+            Tuple[int, int]: The (possibly unchanged) dimensions.
+    """
+    scale = min(1.0, max_size / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
 
+def open_guarded(image_path: str, reduce_by: int) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Opens an image for decoding at no more than the resolution actually needed.
+
+    Only the header is read here. Files over config.MAX_IMAGE_FILE_SIZE are
+    rejected up front. Formats with a reduced-resolution decode path (JPEG) are
+    set to decode at up to 1/`reduce_by` of their size; anything that would
+    still decode to more than config.MAX_IMAGE_PIXELS is rejected.
+
+    Pillow's own decompression bomb check (Image.MAX_IMAGE_PIXELS) still runs
+    on the full header size, before a reduced decode can be requested, and is
+    left untouched since it protects every thread in the process. Images it
+    flags are skipped, so reduced decodes apply to images up to Pillow's limit.
+
+    Args:
+            image_path (str): The file path to the image.
+            reduce_by (int): The factor the caller will downscale the image by.
+
+    Returns:
+            Tuple[Image.Image, Tuple[int, int]]: The opened, not yet decoded,
+                    image (the caller must close it) and its original size.
 
-def pixelate_image(image_path: str) -> None:
+    Raises:
+            ImageSkipped: If the file breaks a guardrail or cannot be identified.
+    """
+    file_size = os.path.getsize(image_path)
+    if file_size > config.MAX_IMAGE_FILE_SIZE:
+        raise ImageSkipped(
+            f"file is {file_size} bytes (limit {config.MAX_IMAGE_FILE_SIZE})")
+
+    try:
+        img = Image.open(image_path)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        # The warning is only raised when warnings are turned into errors
+        raise ImageSkipped(f"over Pillow's decompression bomb limit: {e}") from e
+    except OSError as e:
+        raise ImageSkipped(f"unreadable image header: {e}") from e
+
+    # Ask for a reduced-resolution decode; a no-op for formats without one
+    original_size = img.size
+    img.draft(None, (max(1, img.width // reduce_by),
+                     max(1, img.height // reduce_by)))
+
+    if img.width * img.height > config.MAX_IMAGE_PIXELS:
+        img.close()
+        raise ImageSkipped(
+            f"{original_size[0]}x{original_size[1]} decodes to {img.width}x{img.height}, "
+            f"over {config.MAX_IMAGE_PIXELS} pixels")
+    return img, original_size
+
+
+def pixelate_image(
+    image_path: str,
+    output_path: Optional[str] = None,
+    build_config: Optional[config.BuildConfig] = None
+) -> None:
     """
     Pixelate the given image and saves the result.
 
+    The encoding and resolution cap come from the build's output profile.
+    Oversized, huge or corrupt images are rejected before they are decoded
+    in full (see open_guarded).
+
     Args:
             image_path (str): The file path to the image to be pixelated.
+            output_path (Optional[str]): Where to save the result. Defaults to
+                    config.TEMP_PIXELATED_PATH.
+            build_config (Optional[BuildConfig]): Build settings. Defaults to
+                    the module-level settings in app.config.
 
     Returns:
             None
+
+    Raises:
+            ImageSkipped: If the image breaks a guardrail or fails to decode.
     """
-    with Image.open(image_path) as img:
-        img = img.convert("CMYK")
+    output_path = output_path or config.TEMP_PIXELATED_PATH
+    build_config = build_config or config.BuildConfig()
+    profile = build_config.profile
+    pixel_size = build_config.pixel_size
+    img, original_size = open_guarded(image_path, pixel_size)
+    output_size = capped_size(*original_size, profile['max_image_size'])
+
+    with img:
+        try:
+            img = img.convert("CMYK")
+        except (OSError, SyntaxError, ValueError) as e:
+            raise ImageSkipped(f"failed to decode: {e}") from e
         img_small = img.resize(
-            (max(1, img.width // config.PIXEL_SIZE),
-             max(1, img.height // config.PIXEL_SIZE)),
+            (max(1, original_size[0] // pixel_size),
+             max(1, original_size[1] // pixel_size)),
             Image.NEAREST)
-        img_pixelated = img_small.resize(img.size, Image.NEAREST)
+        img_pixelated = img_small.resize(output_size, Image.NEAREST)
         img_pixelated = ImageEnhance.Brightness(img_pixelated).enhance(1.2)
-        img_pixelated.save(config.TEMP_PIXELATED_PATH, format="JPEG")
+
+        if profile['image_format'] == 'PNG':
+            # PNG has no CMYK mode; mosaics have few colours, so a palette keeps them small
+            img_pixelated = img_pixelated.convert("RGB")
+            if profile['palette_colors']:
+                img_pixelated = img_pixelated.quantize(
+                    colors=profile['palette_colors'])
+            img_pixelated.save(output_path, format="PNG", optimize=True)
+        else:
+            img_pixelated.save(output_path, format="JPEG",
+                               quality=profile['jpeg_quality'])
+
+
+def image_cache_key(image_path: str, build_config: Optional[config.BuildConfig] = None) -> str:
+    """
+    Returns the cache key of the pixelated version of an image.
+
+    The key changes whenever the source file, the pixelation settings or the
+    image settings of the output profile change.
+
+    Args:
+            image_path (str): The file path to the source image.
+            build_config (Optional[BuildConfig]): Build settings.
+
+    Returns:
+            str: The cache key.
+    """
+    build_config = build_config or config.BuildConfig()
+    stat = os.stat(image_path)
+    profile = build_config.profile
+    image_settings = [profile[name] for name in (
+        'image_format', 'jpeg_quality', 'palette_colors', 'max_image_size')]
+    return cache_utils.make_key(
+        'image', os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size,
+        build_config.pixel_size, image_settings)
+
+
+def cached_pixelated_image(image_path: str, build_config: Optional[config.BuildConfig] = None) -> str:
+    """
+    Returns the path of the pixelated image, pixelating it only on a cache miss.
+
+    Args:
+            image_path (str): The file path to the source image.
+            build_config (Optional[BuildConfig]): Build settings.
+
+    Returns:
+            str: Path of the cached pixelated image.
+
+    Raises:
+            ImageSkipped: If the image breaks a guardrail or fails to decode.
+            OSError: If the cache cannot be written; the caller can then
+                    pixelate without it.
+    """
+    build_config = build_config or config.BuildConfig()
+    suffix = '.png' if build_config.profile['image_format'] == 'PNG' else '.jpg'
+    cached_path = cache_utils.cache_path(
+        'images', image_cache_key(image_path, build_config), suffix)
+    if not os.path.exists(cached_path):
+        tmp_path = f'{cached_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            pixelate_image(image_path, tmp_path, build_config)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, cached_path)
+    else:
+        cache_utils.touch(cached_path)
+    return cached_path
@@ -1,11 +1,119 @@
 import argparse
+import contextlib
+import json
 import logging
-from app import config, file_utils, pdf_utils
+import multiprocessing
+import sys
+from typing import TYPE_CHECKING, List
+
+# ReportLab, Pillow and NumPy are only imported once there is work to do, so
+# that --help and argument errors respond immediately
+from app import config, file_utils
+
+if TYPE_CHECKING:
+    from app import pdf_utils
 
 logger = logging.getLogger(__name__)
 
 
-def main():
+def refresh_selection(selection: List[str], index: file_utils.FolderIndex,
+                      number_of_files: int, strategy: str) -> List[str]:
+    """
+    Updates an edition's file selection after the folder changed.
+
+    Files that still exist keep their slot (and so their page number, which
+    keeps their cached pages valid); slots of deleted files, and any missing
+    slots, are filled with newly sampled files.
+
+    Args:
+        selection (List[str]): The previous selection.
+        index (FolderIndex): The updated folder index.
+        number_of_files (int): Number of files in an edition.
+        strategy (str): Sampling strategy for the replacements.
+
+    Returns:
+        List[str]: The new selection.
+    """
+    target = min(number_of_files, len(index))
+    kept = [path for path in selection if path in index.rows][:target]
+    vacancies = target - len(kept)
+    if not vacancies:
+        return kept
+
+    kept_set = set(kept)
+    candidates = index.sample(target + len(kept), strategy)
+    replacements = iter([path for path in candidates if path not in kept_set][:vacancies])
+
+    refreshed = []
+    for path in selection:
+        if path in index.rows:
+            refreshed.append(path)
+        else:
+            replacement = next(replacements, None)
+            if replacement is not None:
+                refreshed.append(replacement)
+    refreshed.extend(replacements)
+    return refreshed[:target]
+
+
+def make_builder(args: argparse.Namespace) -> 'pdf_utils.BookletBuilder':
+    """
+    Creates a booklet builder with the settings given on the command line.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        BookletBuilder: The builder.
+    """
+    from app import pdf_utils
+    return pdf_utils.BookletBuilder(config.BuildConfig(
+        downloads_folder=args.folder,
+        number_of_files=args.files,
+        output_profile=args.profile
+    ))
+
+
+def watch(args: argparse.Namespace) -> None:
+    """
+    Regenerates the booklet whenever the folder changes (the --watch mode).
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    from app import stats_utils, watch_utils
+
+    builder = make_builder(args)
+    selection: List[str] = []
+
+    def regenerate(index: file_utils.FolderIndex) -> None:
+        first_run = not selection
+        selection[:] = refresh_selection(selection, index, args.files, args.sample)
+        if not selection:
+            print('No files found in the specified folder.')
+            return
+        try:
+            builder.build(
+                selection, stats=stats_utils.folder_stats(index),
+                open_viewer=first_run and not args.no_open, output=args.output)
+        except Exception:
+            logger.exception("An error occurred during booklet creation.")
+
+    print(f"Watching {args.folder} for changes (Ctrl+C to stop)")
+    try:
+        watch_utils.watch_folder(args.folder, regenerate)
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> int:
+    """
+    Entry point for the command line interface.
+
+    Returns:
+        int: The exit status: 0 on success, 1 if no booklet (or statistics)
+            could be produced.
+    """
     parser = argparse.ArgumentParser(
         description="Generate a Booklet PDF from your Downloads folder.",
         epilog=(
@@ -15,7 +123,9 @@ def main():
             "folder, and the --files flag to set how many files should be included. "
             "Example usage:\n"
             "    downloads-editions --folder ~/Downloads --files 24\n"
-            "The generated PDF will be automatically opened in your default application."
+            "The generated PDF will be automatically opened in your default application "
+            "(use --no-open to skip this, or -o - to stream the PDF to stdout).\n"
+            "With --watch, the booklet is regenerated whenever the folder changes."
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
@@ -30,14 +140,103 @@ def main():
         default=config.NUMBER_OF_FILES,
         help="Number of files to use (default: %(default)s)"
     )
+    parser.add_argument(
+        "--sample",
+        choices=file_utils.SAMPLING_STRATEGIES,
+        default='uniform',
+        help="How files are picked: uniformly, stratified by extension class, month "
+             "or size bucket, or weighted toward recent files (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(config.OUTPUT_PROFILES),
+        default=config.OUTPUT_PROFILE,
+        help="Output profile trading speed against file size (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print folder statistics as JSON and exit without generating a booklet"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default=config.BOOKLET_PDF_PATH,
+        help="Where to write the PDF; '-' streams it to stdout (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-open",
+        action="store_true",
+        help="Don't open the generated PDF in the default application"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and regenerate the booklet whenever the folder changes"
+    )
     args = parser.parse_args()
 
+    # Progress and report messages from the pipeline's loggers go to stderr
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.output == '-' and not args.stats:
+        if args.watch:
+            parser.error("--watch cannot stream to stdout; use -o PATH")
+        # Keep stdout clean for the PDF bytes: messages go to stderr
+        args.output = sys.stdout.buffer
+        args.no_open = True
+        with contextlib.redirect_stdout(sys.stderr):
+            return generate(args)
+
+    if args.watch:
+        try:
+            watch(args)
+        except OSError as e:
+            print(f"Error reading folder '{args.folder}': {e}")
+            return 1
+        return 0
+
+    return generate(args)
+
+
+def generate(args: argparse.Namespace) -> int:
+    """
+    Generates one booklet (or prints folder statistics with --stats).
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The exit status: 0 on success, 1 if the folder cannot be read,
+            has no files, or the booklet could not be created.
+    """
+    from app import stats_utils
+
+    # Scan once: the same index feeds sampling and the about page statistics
+    try:
+        index = file_utils.FolderIndex(args.folder)
+    except OSError as e:
+        print(f"Error reading folder '{args.folder}': {e}")
+        return 1
+
+    stats = stats_utils.folder_stats(index)
+    if args.stats:
+        print(json.dumps(stats, indent=2))
+        return 0
+
+    if not len(index):
+        print('No files found in the specified folder.')
+        return 1
     try:
-        files = file_utils.get_sample_files(args.folder, args.files)
-        pdf_utils.create_booklet_pdf(files)
-    except Exception as e:
+        files = index.sample(args.files, args.sample)
+        make_builder(args).build(
+            files, stats=stats, open_viewer=not args.no_open, output=args.output)
+    except Exception:
         logger.exception("An error occurred during booklet creation.")
+        return 1
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    # Preview workers are spawned; in a frozen executable they start here
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,30 +1,102 @@
+import io
+import logging
 import os
+import re
+import tempfile
+import time
+from collections import Counter
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Dict, List, Optional, Union
 
+import reportlab
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 from reportlab.platypus import Paragraph, Table, TableStyle
 
-from app import config, file_utils, image_utils
+from app import cache_utils, config, file_utils, preview_utils, stats_utils
+from app.progress import Progress
+
+logger = logging.getLogger(__name__)
 
 # Define a type alias for clarity
 FileInfo = Dict[str, Any]
 PageInfo = Dict[str, Any]
+OutputReport = Dict[str, Any]
+# A file path or a writable binary file object
+Output = Union[str, BinaryIO]
+
+# Extensions that draw_image knows how to pixelate
+IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'bmp']
+
+# Font size and leading of content page titles
+TITLE_FONT_SIZE = 60
+
+# Matches font resource names (e.g. "/F1 ") in a content stream
+FONT_RESOURCE_RE = re.compile(r'/(F\d+) ')
+
+# Matches each indirect object in a written PDF
+PDF_OBJECT_RE = re.compile(rb'\d+ \d+ obj\b(.*?)\bendobj', re.S)
 
 
 styles = getSampleStyleSheet()
-title_style = styles["Normal"]
-title_style.paddingLeft = 0
 
-file_analysis = file_utils.analyze_files_by_creation_date(
-    config.DOWNLOADS_FOLDER)
-if file_analysis is not None:
-    oldest_added_file, recent_added_file = file_analysis
-else:
-    oldest_added_file, recent_added_file = None, None
+
+class BookletBuilder:
+    """
+    Builds booklets from its own settings and paragraph styles.
+
+    Nothing is read from or written to module globals while drawing, so
+    several builders with different settings can run concurrently in one
+    process, e.g. on a thread pool.
+    """
+
+    def __init__(self, build_config: Optional[config.BuildConfig] = None) -> None:
+        """
+        Args:
+            build_config (Optional[BuildConfig]): Settings of the builds.
+                Defaults to the module-level settings in app.config.
+        """
+        self.config = build_config or config.BuildConfig()
+
+        # Styles derived from (not mutating) the shared sample stylesheet
+        normal = styles["Normal"]
+        self.title_style = ParagraphStyle(
+            'BookletTitle', parent=normal, fontSize=TITLE_FONT_SIZE, leading=TITLE_FONT_SIZE)
+        self.cover_style = ParagraphStyle(
+            'BookletCover', parent=normal, fontSize=62, leading=60)
+        self.about_style = ParagraphStyle(
+            'BookletAbout', parent=normal, fontSize=12, leading=12 * 1.2)
+
+    def build(
+        self,
+        files: List[str],
+        progress: Optional[Progress] = None,
+        stats: Optional[stats_utils.FolderStats] = None,
+        open_viewer: bool = True,
+        output: Optional[Output] = None
+    ) -> OutputReport:
+        """
+        Creates a booklet PDF with this builder's settings.
+
+        See create_booklet_pdf for the arguments.
+        """
+        return create_booklet_pdf(files, progress, stats, open_viewer, output, self)
+
+    def render(
+        self,
+        files: List[str],
+        output: Optional[BinaryIO] = None,
+        progress: Optional[Progress] = None,
+        stats: Optional[stats_utils.FolderStats] = None
+    ) -> Optional[bytes]:
+        """
+        Renders a booklet headlessly with this builder's settings.
+
+        See render_booklet for the arguments.
+        """
+        return render_booklet(files, output, progress, stats, self)
 
 
 def justify_text(c: canvas.Canvas, text: str, x: float, y: float, width: float) -> None:
@@ -55,21 +127,69 @@ def justify_text(c: canvas.Canvas, text: str, x: float, y: float, width: float)
             space_between_words  # Move x position
 
 
-def draw_image(c: canvas.Canvas, file_info: FileInfo) -> None:
+def draw_image(
+    c: canvas.Canvas,
+    file_info: FileInfo,
+    builder: Optional[BookletBuilder] = None,
+    progress: Optional[Progress] = None
+) -> None:
     """
-    Draws a pixelated image on the canvas if the file is an image.
+    Draws a pixelated image on the canvas if the file is an image or has a preview.
 
-    This function applies a blend mode, pixelates the image, calculates
-    its aspect ratio, and then draws it onto the canvas.
+    This function applies a blend mode, pixelates the image (or the preview
+    extracted from a PDF, video or archive), calculates its aspect ratio, and
+    then draws it onto the canvas.
 
     Args:
         c (Canvas): The ReportLab canvas to draw on.
         file_info (FileInfo): Dictionary containing file details.
             Expected keys: 'path', 'extension'
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
+            Defaults to a builder with the module-level settings.
+        progress (Optional[Progress]): Cancels a running preview extraction.
+
+    Raises:
+        GenerationCancelled: If cancellation is requested through `progress`
+            while a preview is being extracted.
     """
-    # Only process supported image extensions
-    image_extensions = ['jpg', 'jpeg', 'png', 'gif', 'bmp']
-    if file_info['extension'].lower() not in image_extensions:
+    # Pillow is only needed (and imported) when images are drawn
+    from app import image_utils
+
+    builder = builder or BookletBuilder()
+    cfg = builder.config
+
+    # Only process supported image extensions and files with a preview extractor
+    if is_image_page(file_info):
+        image_path = file_info['path']
+    elif has_preview(file_info):
+        image_path = preview_utils.extract_preview(
+            file_info['path'], file_info['extension'], progress)
+        if image_path is None:
+            return  # Over budget or unreadable: text-only page
+    else:
+        return
+
+    # Process and pixelate the image (reusing the cached result if possible)
+    # Uncached images go to a file of their own, so concurrent builds
+    # cannot overwrite each other's pixelated image
+    cached = cfg.use_page_cache
+    try:
+        if cached:
+            try:
+                pixelated_path = image_utils.cached_pixelated_image(image_path, cfg)
+            except OSError as e:
+                cache_utils.warn_unavailable(e)
+                cached = False
+        if not cached:
+            fd, pixelated_path = tempfile.mkstemp(
+                suffix=os.path.splitext(config.TEMP_PIXELATED_PATH)[1])
+            os.close(fd)
+            image_utils.pixelate_image(image_path, pixelated_path, cfg)
+    except image_utils.ImageSkipped as e:
+        logger.warning("Skipping image for %s: %s",
+                       os.path.basename(file_info['path']), e)
+        if not cached:
+            os.remove(pixelated_path)
         return
 
     # Set up blend mode if not already defined
@@ -87,31 +207,42 @@ def draw_image(c: canvas.Canvas, file_info: FileInfo) -> None:
     # pyright: ignore[reportAttributeAccessIssue]
     c._code.append(f"/{ext_gs_name} gs")
 
-    # Process and pixelate the image
-    image_utils.pixelate_image(file_info['path'])
-    image = ImageReader(config.TEMP_PIXELATED_PATH)
+    reader = ImageReader(pixelated_path)
 
     # Get original dimensions and compute new dimensions to fit the half-page
-    img_width, img_height = image.getSize()
+    img_width, img_height = reader.getSize()
     aspect_ratio = img_width / img_height
-    new_width = config.HALF_WIDTH - 2 * config.MARGIN
+    new_width = cfg.half_width - 2 * cfg.margin
     new_height = new_width / aspect_ratio
 
+    # Cached images have content-addressed paths, so passing the path lets
+    # ReportLab share the XObject without hashing the decoded pixels. Temporary
+    # paths say nothing about the content, so those images are hashed by content.
+    # Inline images are never shared and are always drawn from the path.
+    share = cfg.profile['share_resources']
+    image: Union[str, ImageReader] = reader if share and not cached else pixelated_path
+
     # Draw the image
-    c.drawImage(
+    draw = c.drawImage if share else c.drawInlineImage
+    draw(
         image,
-        config.MARGIN,
-        config.HALF_HEIGHT - new_height - config.MARGIN,
+        cfg.margin,
+        cfg.half_height - new_height - cfg.margin,
         width=new_width,
         height=new_height
     )
     c.restoreState()
 
     # Clean up the temporary pixelated image file
-    os.remove(config.TEMP_PIXELATED_PATH)
+    if not cached:
+        os.remove(pixelated_path)
 
 
-def draw_title(c: canvas.Canvas, file_info: FileInfo) -> None:
+def draw_title(
+    c: canvas.Canvas,
+    file_info: FileInfo,
+    builder: Optional[BookletBuilder] = None
+) -> None:
     """
     Draws the title on the canvas.
 
@@ -121,25 +252,29 @@ def draw_title(c: canvas.Canvas, file_info: FileInfo) -> None:
         c (Canvas): The ReportLab canvas to draw on.
         file_info (FileInfo): Dictionary containing file details.
             Expected key: 'path'
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
     """
-    # Set title style parameters
-    title_style.fontSize = 60
-    title_style.leading = 60
+    builder = builder or BookletBuilder()
+    cfg = builder.config
 
     # Extract and shorten the file name for the title
     title = os.path.basename(file_info['path'])
-    title = shorten_text(title, config.TITLE_TEXT_LENGTH)
+    title = shorten_text(title, cfg.title_text_length)
 
     # Create and draw the title paragraph
-    c_text = Paragraph(title, title_style)
-    c_text.wrapOn(c, config.HALF_WIDTH - 2 * config.MARGIN,
-                  config.HALF_HEIGHT - 2 * config.MARGIN)
+    c_text = Paragraph(title, builder.title_style)
+    c_text.wrapOn(c, cfg.half_width - 2 * cfg.margin,
+                  cfg.half_height - 2 * cfg.margin)
     # Adjust vertical position based on the paragraph height and margin
-    c_text.drawOn(c, config.MARGIN, config.HALF_HEIGHT -
-                  (c_text.height - (2 * config.MARGIN) * 2))
+    c_text.drawOn(c, cfg.margin, cfg.half_height -
+                  (c_text.height - (2 * cfg.margin) * 2))
 
 
-def draw_centered_text(c: canvas.Canvas, file_info: FileInfo) -> None:
+def draw_centered_text(
+    c: canvas.Canvas,
+    file_info: FileInfo,
+    builder: Optional[BookletBuilder] = None
+) -> None:
     """
     Draws centered text on the canvas containing file metadata.
 
@@ -149,40 +284,54 @@ def draw_centered_text(c: canvas.Canvas, file_info: FileInfo) -> None:
         c (Canvas): The ReportLab canvas to draw on.
         file_info (FileInfo): Dictionary containing file details.
             Expected keys: 'date', 'extension', 'size'
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
     """
-    center_text = f'{file_info["date"]} | {
-        file_info["extension"]} | {file_info["size"]} bytes'
+    cfg = (builder or BookletBuilder()).config
+    center_text = f'{file_info["date"]} | {file_info["extension"]} | {file_info["size"]} bytes'
     justify_text(
         c,
         center_text,
-        config.MARGIN,
-        config.HALF_HEIGHT / 2,
-        config.HALF_WIDTH - 2 * config.MARGIN
+        cfg.margin,
+        cfg.half_height / 2,
+        cfg.half_width - 2 * cfg.margin
     )
 
 
-def draw_page_number(c: canvas.Canvas, page_num: int) -> None:
+def draw_page_number(
+    c: canvas.Canvas,
+    page_num: int,
+    builder: Optional[BookletBuilder] = None
+) -> None:
     """
     Draws the page number on the canvas.
 
     Args:
         c (Canvas): The ReportLab canvas to draw on.
         page_num (int): The page number to display.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
     """
+    cfg = (builder or BookletBuilder()).config
+
     # Calculate the width of the page number text to center it
     page_num_str = str(page_num)
     text_width = c.stringWidth(page_num_str, "Helvetica", 12)
-    center_x = (config.HALF_WIDTH - text_width) / 2
+    center_x = (cfg.half_width - text_width) / 2
 
     c.drawString(
         center_x,
-        config.MARGIN,
+        cfg.margin,
         page_num_str,
         direction='LTR'
     )
 
 
-def draw_page_content(c: canvas.Canvas, file_info: FileInfo, page_num: int) -> None:
+def draw_page_content(
+    c: canvas.Canvas,
+    file_info: FileInfo,
+    page_num: int,
+    builder: Optional[BookletBuilder] = None,
+    progress: Optional[Progress] = None
+) -> None:
     """
     Draws the content of a page, including an image (if applicable),
     the title, centered metadata text, and the page number.
@@ -191,19 +340,161 @@ def draw_page_content(c: canvas.Canvas, file_info: FileInfo, page_num: int) -> N
         c (Canvas): The ReportLab canvas to draw on.
         file_info (FileInfo): Dictionary containing file details.
         page_num (int): The page number to display.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
+        progress (Optional[Progress]): Cancels a running preview extraction.
     """
-    # Draw the image if the file is of an image type and DRAW_IMAGES is enabled
-    if config.DRAW_IMAGES:
-        draw_image(c, file_info)
+    builder = builder or BookletBuilder()
+
+    # Draw the image if the file is of an image type and draw_images is enabled
+    if builder.config.draw_images:
+        draw_image(c, file_info, builder, progress)
+
+    # Splice in the text of this page from a previous edition if it is unchanged
+    key = page_cache_key(file_info, page_num, builder) if builder.config.use_page_cache else None
+    if key is not None:
+        entry = cache_utils.load_entry('pages', key)
+        if entry is not None and splice_cached_page(c, entry):
+            return
+
+    start = len(c._code)  # pyright: ignore[reportAttributeAccessIssue]
 
     # Draw the file title
-    draw_title(c, file_info)
+    draw_title(c, file_info, builder)
 
     # Draw the centered file metadata text
-    draw_centered_text(c, file_info)
+    draw_centered_text(c, file_info, builder)
 
     # Draw the page number at the bottom-right
-    draw_page_number(c, page_num)
+    draw_page_number(c, page_num, builder)
+
+    if key is not None:
+        cache_utils.store_entry('pages', key, capture_page(c, start))
+
+
+def page_cache_key(
+    file_info: FileInfo,
+    page_num: int,
+    builder: Optional[BookletBuilder] = None
+) -> str:
+    """
+    Builds the cache key of a content page.
+
+    The key covers everything that affects the drawn page: the file details,
+    the page number, the layout and style settings, the pixelated image, and
+    the ReportLab version (the cached operators are ReportLab's output).
+
+    Args:
+        file_info (FileInfo): Dictionary containing file details.
+        page_num (int): The page number to display.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
+
+    Returns:
+        str: The cache key.
+    """
+    builder = builder or BookletBuilder()
+    cfg = builder.config
+    image_key = None
+    if cfg.draw_images and has_visual(file_info):
+        from app import image_utils
+        image_key = image_utils.image_cache_key(file_info['path'], cfg)
+
+    style_settings = [
+        cfg.half_width, cfg.half_height, cfg.margin,
+        cfg.title_text_length, builder.title_style.fontName, TITLE_FONT_SIZE
+    ]
+    return cache_utils.make_key('page', reportlab.Version, file_info, page_num,
+                                style_settings, image_key)
+
+
+def capture_page(c: canvas.Canvas, start: int) -> cache_utils.CacheEntry:
+    """
+    Captures the content stream operators drawn since `start` as a cache entry.
+
+    Font resource names are document specific, so the entry also records which
+    font each name referred to. Drawing can also raise the document's PDF
+    version (paragraphs set a fill alpha, which needs PDF 1.4), so the version
+    is recorded too.
+
+    Args:
+        c (Canvas): The ReportLab canvas that was drawn on.
+        start (int): Length of the canvas code list before drawing.
+
+    Returns:
+        CacheEntry: A dictionary with the 'code' operators, the 'fonts' they
+            use and the 'pdf_version' they need.
+    """
+    code = c._code[start:]  # pyright: ignore[reportAttributeAccessIssue]
+    used = set(FONT_RESOURCE_RE.findall(' '.join(code)))
+    fonts = {
+        font_name: internal_name
+        for font_name, internal_name in c._doc.fontMapping.items()
+        if internal_name.lstrip('/') in used
+    }
+    pdf_version = list(c._doc._pdfVersion)  # pyright: ignore[reportAttributeAccessIssue]
+    return {'code': code, 'fonts': fonts, 'pdf_version': pdf_version}
+
+
+def splice_cached_page(c: canvas.Canvas, entry: cache_utils.CacheEntry) -> bool:
+    """
+    Appends cached content stream operators to the current page.
+
+    Args:
+        c (Canvas): The ReportLab canvas to draw on.
+        entry (CacheEntry): An entry produced by capture_page.
+
+    Returns:
+        bool: True if the entry was spliced in, False if its font resources
+            do not match this document and the page must be redrawn.
+    """
+    for font_name, internal_name in entry['fonts'].items():
+        if c._doc.getInternalFontName(font_name) != internal_name:
+            return False
+    c._code.extend(entry['code'])  # pyright: ignore[reportAttributeAccessIssue]
+    c._doc._pdfVersion = max(  # pyright: ignore[reportAttributeAccessIssue]
+        c._doc._pdfVersion, tuple(entry['pdf_version']))  # pyright: ignore[reportAttributeAccessIssue]
+    return True
+
+
+def is_image_page(file_info: FileInfo) -> bool:
+    """
+    Checks whether the file is an image that draw_image would pixelate.
+
+    Args:
+        file_info (FileInfo): Dictionary containing file details.
+            Expected key: 'extension'
+
+    Returns:
+        bool: True if the file extension is a supported image type.
+    """
+    return file_info['extension'].lower() in IMAGE_EXTENSIONS
+
+
+def has_preview(file_info: FileInfo) -> bool:
+    """
+    Checks whether a preview of the file can be extracted, i.e. an extractor
+    is registered for its extension and the tool it runs is installed.
+
+    Args:
+        file_info (FileInfo): Dictionary containing file details.
+            Expected key: 'extension'
+
+    Returns:
+        bool: True if draw_image can try to extract a preview of the file.
+    """
+    return preview_utils.can_preview(file_info['extension'])
+
+
+def has_visual(file_info: FileInfo) -> bool:
+    """
+    Checks whether draw_image will try to draw anything for the file.
+
+    Args:
+        file_info (FileInfo): Dictionary containing file details.
+
+    Returns:
+        bool: True for images and files with a preview extractor.
+    """
+    return is_image_page(file_info) or has_preview(file_info)
 
 
 def shorten_text(text: str, max_length: int) -> str:
@@ -242,12 +533,30 @@ def prepare_file_infos(files: List[str]) -> List[FileInfo]:
     return file_infos
 
 
-def build_pages(file_infos: List[FileInfo]) -> List[PageInfo]:
+def source_folder(files: List[str]) -> Optional[str]:
+    """
+    Returns the folder the files are in.
+
+    Args:
+        files (List[str]): List of file paths.
+
+    Returns:
+        Optional[str]: The folder, or None if the files are not all in one folder.
+    """
+    folders = {os.path.dirname(os.path.abspath(f)) for f in files}
+    return folders.pop() if len(folders) == 1 else None
+
+
+def build_pages(
+    file_infos: List[FileInfo],
+    stats: Optional[stats_utils.FolderStats] = None
+) -> List[PageInfo]:
     """
     Build the initial list of pages for the booklet.
 
     Args:
         file_infos (List[FileInfo]): A list of file information dictionaries.
+        stats (Optional[FolderStats]): Statistics of the source folder for the about page.
 
     Returns:
         List[PageInfo]: A list of page dictionaries.
@@ -270,7 +579,7 @@ def build_pages(file_infos: List[FileInfo]) -> List[PageInfo]:
 
     # Additional empty page and about page
     pages.append({'type': 'empty'})
-    pages.append({'type': 'about'})
+    pages.append({'type': 'about', 'stats': stats})
 
     return pages
 
@@ -315,43 +624,198 @@ def rearrange_pages_for_booklet(pages: List[PageInfo]) -> List[PageInfo]:
     return booklet_order
 
 
-def generate_booklet_pdf(booklet_order: List[PageInfo]) -> None:
+def count_image_pages(
+    booklet_order: List[PageInfo],
+    builder: Optional[BookletBuilder] = None
+) -> int:
+    """
+    Counts the pages that may have a pixelated image or preview drawn on them.
+
+    Args:
+        booklet_order (List[PageInfo]): List of pages in booklet order.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
+
+    Returns:
+        int: Number of image pages, or 0 if draw_images is disabled.
+    """
+    if not (builder or BookletBuilder()).config.draw_images:
+        return 0
+    return sum(
+        1 for page in booklet_order
+        if page.get('type') == 'content' and has_visual(page['file_info'])
+    )
+
+
+def classify_pdf_object(body: bytes) -> str:
+    """
+    Classifies the body of a PDF indirect object for the output report.
+
+    Args:
+        body (bytes): The bytes between "obj" and "endobj".
+
+    Returns:
+        str: One of 'image', 'form', 'font', 'page', 'content', or 'other'.
+    """
+    header = body.split(b'stream', 1)[0]
+    if b'/Subtype /Image' in header:
+        return 'image'
+    if b'/Subtype /Form' in header:
+        return 'form'
+    if b'/Type /Font' in header or b'/FontDescriptor' in header:
+        return 'font'
+    if b'/Type /Page' in header and b'/Type /Pages' not in header:
+        return 'page'
+    if b'stream' in body:
+        return 'content'
+    return 'other'
+
+
+def measure_pdf(data: bytes) -> Dict[str, int]:
+    """
+    Breaks down the size of a written PDF by object type.
+
+    Args:
+        data (bytes): The complete PDF file.
+
+    Returns:
+        Dict[str, int]: Bytes per object type. Header, cross-reference table
+            and trailer are counted as 'structure'.
+    """
+    breakdown: Counter = Counter()
+    for match in PDF_OBJECT_RE.finditer(data):
+        breakdown[classify_pdf_object(match.group(1))] += len(match.group(0))
+    breakdown['structure'] = len(data) - sum(breakdown.values())
+    return dict(breakdown)
+
+
+def log_output_report(report: OutputReport) -> None:
+    """
+    Logs the output report produced by generate_booklet_pdf.
+
+    Args:
+        report (OutputReport): The report dictionary.
+    """
+    logger.info("Output profile '%s': %.1f KB, rendered in %.2fs, encoded in %.2fs",
+                report['profile'], report['total_bytes'] / 1024,
+                report['render_seconds'], report['encode_seconds'])
+    for kind, size in sorted(report['bytes_by_type'].items(), key=lambda item: -item[1]):
+        logger.info("  %-10s %9.1f KB", kind, size / 1024)
+
+
+def generate_booklet_pdf(
+    booklet_order: List[PageInfo],
+    progress: Optional[Progress] = None,
+    open_viewer: bool = True,
+    output: Optional[Output] = None,
+    builder: Optional[BookletBuilder] = None
+) -> OutputReport:
     """
     Generates the PDF for the booklet using the given page order.
 
+    The build's output profile controls stream compression
+    and image handling. A report of the render/encode times and the byte
+    breakdown by object type is logged and returned.
+
     Args:
         booklet_order (List[PageInfo]): List of pages in booklet order.
+        progress (Optional[Progress]): Receives 'pixelate' and 'render' events and
+            may cancel the run between half pages.
+        open_viewer (bool): Open the PDF in the default application afterwards.
+            Ignored when writing to a file object.
+        output (Optional[Output]): File path or writable binary file object to
+            write the PDF to. Defaults to the build's output_path.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
 
     Returns:
-        None
+        OutputReport: Profile name, 'render_seconds', 'encode_seconds',
+            'total_bytes' and 'bytes_by_type'.
+
+    Raises:
+        GenerationCancelled: If cancellation is requested through `progress`.
+            No PDF is written in that case.
     """
-    c = canvas.Canvas(config.BOOKLET_PDF_PATH,
-                      pagesize=(config.LANDSCAPE_WIDTH, config.LANDSCAPE_HEIGHT))
+    progress = progress or Progress()
+    builder = builder or BookletBuilder()
+    cfg = builder.config
+    total_sheets = len(booklet_order) // 2
+    total_images = count_image_pages(booklet_order, builder)
+    images_done = 0
+
+    output = cfg.output_path if output is None else output
+
+    # Render in memory; the bytes are measured and then written out in one go
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer,
+                      pagesize=(cfg.landscape_width, cfg.landscape_height),
+                      pageCompression=cfg.profile['page_compression'])
+
+    render_started = time.perf_counter()
+    progress.update('render', 0, total_sheets)
 
     # Draw two pages per LANDSCAPE sheet
     for i in range(0, len(booklet_order), 2):
-        c.setPageSize((config.LANDSCAPE_WIDTH, config.LANDSCAPE_HEIGHT))
+        c.setPageSize((cfg.landscape_width, cfg.landscape_height))
+
+        for half, offset in enumerate((0, cfg.landscape_width / 2)):
+            page_info = booklet_order[i + half]
 
-        # Left half
-        c.saveState()
-        c.translate(0, 0)
-        draw_half_page(c, booklet_order[i])
-        c.restoreState()
+            c.saveState()
+            c.translate(offset, 0)
+            draw_half_page(c, page_info, builder, progress)
+            c.restoreState()
 
-        # Right half
-        c.saveState()
-        c.translate(config.LANDSCAPE_WIDTH / 2, 0)
-        draw_half_page(c, booklet_order[i + 1])
-        c.restoreState()
+            if total_images and page_info.get('type') == 'content' and has_visual(page_info['file_info']):
+                images_done += 1
+                progress.update('pixelate', images_done, total_images)
+            else:
+                progress.check()
 
         c.showPage()
+        progress.update('render', i // 2 + 1, total_sheets)
 
+    encode_started = time.perf_counter()
     c.save()
-    print(f'Booklet PDF generated: {config.BOOKLET_PDF_PATH}')
-    file_utils.open_file_in_default_app(config.BOOKLET_PDF_PATH)
+    encode_finished = time.perf_counter()
 
-
-def create_booklet_pdf(files: List[str]) -> None:
+    data = buffer.getvalue()
+    if isinstance(output, str):
+        with open(output, 'wb') as fh:
+            fh.write(data)
+    else:
+        output.write(data)
+        output.flush()
+
+    report: OutputReport = {
+        'profile': cfg.output_profile,
+        'render_seconds': encode_started - render_started,
+        'encode_seconds': encode_finished - encode_started,
+        'total_bytes': len(data),
+        'bytes_by_type': measure_pdf(data)
+    }
+
+    if isinstance(output, str):
+        logger.info('Booklet PDF generated: %s', output)
+    else:
+        logger.info('Booklet PDF generated: %d bytes written to %s',
+                    len(data), getattr(output, 'name', 'stream'))
+    log_output_report(report)
+
+    # Keep the persistent cache bounded now that this edition's entries are stored
+    cache_utils.prune_if_due()
+
+    if open_viewer and isinstance(output, str):
+        file_utils.open_file_in_default_app(output)
+    return report
+
+
+def create_booklet_pdf(
+    files: List[str],
+    progress: Optional[Progress] = None,
+    stats: Optional[stats_utils.FolderStats] = None,
+    open_viewer: bool = True,
+    output: Optional[Output] = None,
+    builder: Optional[BookletBuilder] = None
+) -> OutputReport:
     """
     Creates a booklet PDF from a list of file paths.
 
@@ -361,66 +825,121 @@ def create_booklet_pdf(files: List[str]) -> None:
 
     Args:
         files (List[str]): List of file paths to include in the booklet.
+        progress (Optional[Progress]): Progress reporter and cancellation flag.
+        stats (Optional[FolderStats]): Statistics of the source folder for the
+            about page. If not given, the folder the files are in is scanned
+            (when they are all in one folder; otherwise the about page has
+            no folder statistics).
+        open_viewer (bool): Open the PDF in the default application afterwards.
+        output (Optional[Output]): File path or writable binary file object to
+            write the PDF to. Defaults to the build's output_path.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
 
     Returns:
-        None
+        OutputReport: The output report of generate_booklet_pdf.
     """
     # Prepare file info
+    builder = builder or BookletBuilder()
     file_infos = prepare_file_infos(files)
+    if stats is None:
+        folder = source_folder(files)
+        stats = stats_utils.load_folder_stats(folder) if folder else None
 
     # Build and pad pages
-    pages = build_pages(file_infos)
+    pages = build_pages(file_infos, stats)
     pages = pad_pages_to_multiple_of_four(pages)
 
     # Rearrange pages for booklet printing
     booklet_order = rearrange_pages_for_booklet(pages)
 
     # Generate the PDF
-    generate_booklet_pdf(booklet_order)
+    return generate_booklet_pdf(booklet_order, progress, open_viewer, output, builder)
+
+
+def render_booklet(
+    files: List[str],
+    output: Optional[BinaryIO] = None,
+    progress: Optional[Progress] = None,
+    stats: Optional[stats_utils.FolderStats] = None,
+    builder: Optional[BookletBuilder] = None
+) -> Optional[bytes]:
+    """
+    Headless entry point: renders a booklet without touching the default
+    output path or launching a viewer.
 
+    With draw_images on, previews of non-image files are extracted in worker
+    processes started with multiprocessing's 'spawn' method. Callers must
+    guard their entry point with `if __name__ == '__main__':` (and call
+    multiprocessing.freeze_support() first in frozen executables). When run
+    from stdin, a REPL or an unguarded script, those files get text-only pages.
 
-def draw_cover_page(c: canvas.Canvas) -> None:
+    Args:
+        files (List[str]): List of file paths to include in the booklet.
+        output (Optional[BinaryIO]): Writable binary file object to stream the
+            PDF into. If omitted, the PDF is returned as bytes.
+        progress (Optional[Progress]): Progress reporter and cancellation flag.
+        stats (Optional[FolderStats]): Statistics of the source folder for the
+            about page. Scanned from the files' folder if not given.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
+
+    Returns:
+        Optional[bytes]: The PDF bytes if no output was given, otherwise None.
+    """
+    target = io.BytesIO() if output is None else output
+    create_booklet_pdf(files, progress=progress, stats=stats,
+                       open_viewer=False, output=target, builder=builder)
+    if output is None:
+        return target.getvalue()  # pyright: ignore[reportAttributeAccessIssue]
+    return None
+
+
+def draw_cover_page(c: canvas.Canvas, builder: Optional[BookletBuilder] = None) -> None:
     """
     Draws the cover page on the given canvas.
 
     Args:
         c (Canvas): The ReportLab canvas to draw on.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
     """
-    title_style.fontSize = 62
-    title_style.leading = 60
+    builder = builder or BookletBuilder()
+    cfg = builder.config
 
     cover_page = Paragraph(
         '''/Downloads<br/>/Downloads<br/>.pdf''',
-        title_style
+        builder.cover_style
     )
-    cover_page.wrapOn(c, config.HALF_WIDTH - 2 * config.MARGIN,
-                      config.HALF_HEIGHT - 2 * config.MARGIN)
-    cover_page.drawOn(c, config.MARGIN,
-                      config.HALF_HEIGHT - (cover_page.height - (2 * config.MARGIN) * 2))
+    cover_page.wrapOn(c, cfg.half_width - 2 * cfg.margin,
+                      cfg.half_height - 2 * cfg.margin)
+    cover_page.drawOn(c, cfg.margin,
+                      cfg.half_height - (cover_page.height - (2 * cfg.margin) * 2))
 
 
-def draw_about_page(c: canvas.Canvas) -> None:
+def draw_about_page(
+    c: canvas.Canvas,
+    stats: Optional[stats_utils.FolderStats] = None,
+    builder: Optional[BookletBuilder] = None
+) -> None:
     """
     Draws the about page on the given canvas.
 
     Args:
         c (Canvas): The ReportLab canvas to draw on.
+        stats (Optional[FolderStats]): Statistics of the source folder. Without
+            them the folder is described as empty as of today.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
     """
-    # Create a local style based on the default "Normal" style
-    about_style = styles["Normal"]
-    about_style.fontSize = 12
-    about_style.leading = 12 * 1.2
+    builder = builder or BookletBuilder()
+    cfg = builder.config
 
-    # Handle case where config.USER_NAME might be None
-    user_name = config.USER_NAME.capitalize() if config.USER_NAME else "Unknown User"
+    # Handle case where the user name might be None
+    user_name = cfg.user_name.capitalize() if cfg.user_name else "Unknown User"
 
-    # Calculate number of files/folders in downloads folder
-    try:
-        items = [f for f in os.listdir(
-            config.DOWNLOADS_FOLDER) if not f.startswith('.')]
-        file_count = len(items)
-    except Exception:
-        file_count = 0
+    # Number of files in the folder and the date of the newest one
+    file_count = stats['file_count'] if stats else 0
+    if stats and stats['newest']:
+        as_of = datetime.fromisoformat(stats['newest']['date'])
+    else:
+        as_of = datetime.now()
 
     # Build about text conditionally based on whether file analysis is available
     about_text = (
@@ -429,30 +948,37 @@ def draw_about_page(c: canvas.Canvas) -> None:
         f"gathered in passing and left in a temporary state, waiting either to be sorted "
         f"into folders or quietly forgotten. As part of this ongoing project examining "
         f"the often-overlooked landscapes of our digital collections, this folder as of "
-        f"{recent_added_file[1].strftime('%m.%d.%Y')} has {file_count} files, and included in  "
-        f" this publication are {config.NUMBER_OF_FILES} files randomly selected."
+        f"{as_of.strftime('%m.%d.%Y')} has {file_count} files, and included in  "
+        f" this publication are {cfg.number_of_files} files randomly selected."
         f"\n"
         f"Developed by Alvin Ashiatey, this project aims to capture snapshots of our Download folders, the directory where the internet meets the local machine. I originally created this tool to reflect on my own digital consumption habits over time, but I soon realized it could be interesting to share with others. Together, we might create a larger snapshot of internet culture as seen through our Download folders."
     )
 
     # Replace any newline with <br/> if needed
     about_text = about_text.replace('\n', '<br/>')
-    about_page = Paragraph(about_text, about_style)
+    about_page = Paragraph(about_text, builder.about_style)
 
-    about_page.wrapOn(c, config.HALF_WIDTH - 2 * config.MARGIN,
-                      config.HALF_HEIGHT - 2 * config.MARGIN)
-    about_page.drawOn(c, config.MARGIN,
-                      config.HALF_HEIGHT - (about_page.height - (2 * config.MARGIN)))
+    about_page.wrapOn(c, cfg.half_width - 2 * cfg.margin,
+                      cfg.half_height - 2 * cfg.margin)
+    about_page.drawOn(c, cfg.margin,
+                      cfg.half_height - (about_page.height - (2 * cfg.margin)))
 
 
-def draw_file_list_page(c: canvas.Canvas, file_infos: List[FileInfo]) -> None:
+def draw_file_list_page(
+    c: canvas.Canvas,
+    file_infos: List[FileInfo],
+    builder: Optional[BookletBuilder] = None
+) -> None:
     """
     Draws a table listing all files included in the booklet.
 
     Args:
         c (Canvas): The ReportLab canvas to draw on.
         file_infos (List[FileInfo]): List of file information dictionaries.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
     """
+    cfg = (builder or BookletBuilder()).config
+
     # Prepare table data
     data = [['Name', 'Kind', 'Size', 'Date Added']]
     for info in file_infos:
@@ -468,7 +994,7 @@ def draw_file_list_page(c: canvas.Canvas, file_infos: List[FileInfo]) -> None:
     # Create table
     # Adjusted column widths to accommodate the Name column
     table = Table(data, colWidths=[
-                  config.HALF_WIDTH * 0.35, config.HALF_WIDTH * 0.15, config.HALF_WIDTH * 0.2, config.HALF_WIDTH * 0.2])
+                  cfg.half_width * 0.35, cfg.half_width * 0.15, cfg.half_width * 0.2, cfg.half_width * 0.2])
 
     # Style the table
     style = TableStyle([
@@ -483,13 +1009,19 @@ def draw_file_list_page(c: canvas.Canvas, file_infos: List[FileInfo]) -> None:
     table.setStyle(style)
 
     # Draw table
-    w, h = table.wrap(config.HALF_WIDTH - 2 * config.MARGIN,
-                      config.HALF_HEIGHT - 2 * config.MARGIN)
-    table.drawOn(c, config.MARGIN, config.HALF_HEIGHT -
-                 h - config.MARGIN - 20)  # 20px padding from top
-
-
-def draw_content_page(c: canvas.Canvas, file_info: Dict[str, Any], page_num: int) -> None:
+    w, h = table.wrap(cfg.half_width - 2 * cfg.margin,
+                      cfg.half_height - 2 * cfg.margin)
+    table.drawOn(c, cfg.margin, cfg.half_height -
+                 h - cfg.margin - 20)  # 20px padding from top
+
+
+def draw_content_page(
+    c: canvas.Canvas,
+    file_info: Dict[str, Any],
+    page_num: int,
+    builder: Optional[BookletBuilder] = None,
+    progress: Optional[Progress] = None
+) -> None:
     """
     Draws a content page on the canvas using the provided file information.
 
@@ -497,8 +1029,10 @@ def draw_content_page(c: canvas.Canvas, file_info: Dict[str, Any], page_num: int
         c (Canvas): The ReportLab canvas to draw on.
         file_info (Dict[str, Any]): Dictionary containing information about the file.
         page_num (int): The page number to be displayed.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
+        progress (Optional[Progress]): Cancels a running preview extraction.
     """
-    draw_page_content(c, file_info, page_num)
+    draw_page_content(c, file_info, page_num, builder, progress)
 
 
 def draw_empty_page(c: canvas.Canvas) -> None:
@@ -512,7 +1046,12 @@ def draw_empty_page(c: canvas.Canvas) -> None:
     pass
 
 
-def draw_half_page(c: canvas.Canvas, page_info: PageInfo) -> None:
+def draw_half_page(
+    c: canvas.Canvas,
+    page_info: PageInfo,
+    builder: Optional[BookletBuilder] = None,
+    progress: Optional[Progress] = None
+) -> None:
     """
     Draws the appropriate content on half a page based on the page type.
 
@@ -522,16 +1061,18 @@ def draw_half_page(c: canvas.Canvas, page_info: PageInfo) -> None:
             Expected keys:
               - 'type': One of 'cover', 'about', 'content', or 'empty'.
               - For 'content', also expects 'file_info' and 'page_num'.
+        builder (Optional[BookletBuilder]): Settings and styles of the build.
+        progress (Optional[Progress]): Cancels a running preview extraction.
     """
     page_type = page_info.get('type')
 
     if page_type == 'cover':
-        draw_cover_page(c)
+        draw_cover_page(c, builder)
     elif page_type == 'file_list':
-        draw_file_list_page(c, page_info['file_infos'])
+        draw_file_list_page(c, page_info['file_infos'], builder)
     elif page_type == 'about':
-        draw_about_page(c)
+        draw_about_page(c, page_info.get('stats'), builder)
     elif page_type == 'content':
-        draw_content_page(c, page_info['file_info'], page_info['page_num'])
+        draw_content_page(c, page_info['file_info'], page_info['page_num'], builder, progress)
     else:
         draw_empty_page(c)
@@ -0,0 +1,380 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Callable, Dict, Optional
+
+from app import cache_utils, config
+from app.progress import Progress
+
+logger = logging.getLogger(__name__)
+
+# An extractor writes a preview image of the source file to the output path
+PreviewExtractor = Callable[[str, str], None]
+
+# Extractors keyed by lower-case extension (without the dot)
+EXTRACTORS: Dict[str, PreviewExtractor] = {}
+
+# External tool each extractor runs, if any, keyed by extractor
+EXTRACTOR_TOOLS: Dict[PreviewExtractor, str] = {}
+
+# Whether each tool was found on the PATH, looked up once per process
+_tool_found: Dict[str, bool] = {}
+
+# Image types a preview can be pulled out of an archive as
+ARCHIVE_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+
+# Bytes read at a time when copying an image out of an archive
+ARCHIVE_COPY_CHUNK = 1024 * 1024
+
+# Worker exit codes: the file cannot be previewed (cached), or the failure may
+# go away on a later run, e.g. once a missing tool is installed (not cached).
+# Both differ from 1, which a worker that crashes while starting up exits with.
+FAILED_EXIT_CODE = 3
+TRANSIENT_EXIT_CODE = 4
+
+# How often (seconds) a waiting extraction checks for cancellation
+CANCEL_POLL_INTERVAL = 0.1
+
+# Set once a worker could not start (exit code 1); no more are started then
+_workers_broken = False
+
+# Where previews go for the rest of the process if the cache is unusable
+_fallback_folder: Optional[str] = None
+
+
+class ExtractorUnavailable(Exception):
+    """Raised by an extractor whose external tool is not installed."""
+
+
+def register_extractor(
+    extensions: str,
+    extractor: PreviewExtractor,
+    tool: Optional[str] = None
+) -> None:
+    """
+    Registers a preview extractor for one or more extensions.
+
+    Extractors run in a separate worker process, so they must be top-level
+    (picklable) functions.
+
+    Args:
+        extensions (str): Space-separated extensions, e.g. 'mp4 mov'.
+        extractor (PreviewExtractor): Function taking (source_path, output_path).
+        tool (Optional[str]): External program the extractor runs. If it is
+            not on the PATH, no worker is started for the extractor.
+    """
+    for extension in extensions.split():
+        EXTRACTORS[extension.lower()] = extractor
+    if tool is not None:
+        EXTRACTOR_TOOLS[extractor] = tool
+
+
+def get_extractor(extension: str) -> Optional[PreviewExtractor]:
+    """
+    Returns the preview extractor registered for the extension, if any.
+
+    Args:
+        extension (str): File extension without the dot.
+
+    Returns:
+        Optional[PreviewExtractor]: The extractor, or None.
+    """
+    return EXTRACTORS.get(extension.lower())
+
+
+def extractor_available(extractor: PreviewExtractor) -> bool:
+    """
+    Checks whether the external tool an extractor runs is installed.
+
+    The PATH is searched once per tool and process, and a missing tool is
+    reported once.
+
+    Args:
+        extractor (PreviewExtractor): A registered extractor.
+
+    Returns:
+        bool: False if the extractor's tool is missing, True otherwise.
+    """
+    tool = EXTRACTOR_TOOLS.get(extractor)
+    if tool is None:
+        return True
+    if tool not in _tool_found:
+        _tool_found[tool] = shutil.which(tool) is not None
+        if not _tool_found[tool]:
+            logger.warning("%s is not installed; its files get text-only pages", tool)
+    return _tool_found[tool]
+
+
+def can_preview(extension: str) -> bool:
+    """
+    Checks whether previews of files with the extension can be extracted.
+
+    Args:
+        extension (str): File extension without the dot.
+
+    Returns:
+        bool: True if an extractor is registered and its tool is installed.
+    """
+    extractor = get_extractor(extension)
+    return extractor is not None and extractor_available(extractor)
+
+
+def extract_pdf_first_page(source_path: str, output_path: str) -> None:
+    """
+    Renders the first page of a PDF to PNG using Poppler's pdftoppm.
+
+    Args:
+        source_path (str): The PDF file.
+        output_path (str): Where to write the PNG.
+    """
+    if shutil.which('pdftoppm') is None:
+        raise ExtractorUnavailable('pdftoppm is not installed')
+    output_prefix = os.path.splitext(output_path)[0]
+    subprocess.run(
+        ['pdftoppm', '-png', '-singlefile', '-f', '1', '-l', '1',
+         '-scale-to', '1200', source_path, output_prefix],
+        check=True, capture_output=True, timeout=config.PREVIEW_TIME_BUDGET)
+    os.replace(output_prefix + '.png', output_path)
+
+
+def extract_video_frame(source_path: str, output_path: str) -> None:
+    """
+    Decodes a single frame, one second in, from a video using ffmpeg.
+
+    Args:
+        source_path (str): The video file.
+        output_path (str): Where to write the PNG.
+    """
+    if shutil.which('ffmpeg') is None:
+        raise ExtractorUnavailable('ffmpeg is not installed')
+    subprocess.run(
+        ['ffmpeg', '-nostdin', '-loglevel', 'error', '-y', '-ss', '1',
+         '-i', source_path, '-frames:v', '1', '-f', 'image2', output_path],
+        check=True, capture_output=True, timeout=config.PREVIEW_TIME_BUDGET)
+    if not os.path.exists(output_path):
+        raise RuntimeError('ffmpeg did not produce a frame')
+
+
+def extract_archive_image(source_path: str, output_path: str) -> None:
+    """
+    Copies out the first image stored in a zip archive.
+
+    Images larger than config.MAX_IMAGE_FILE_SIZE would be skipped when
+    pixelated, so they are not extracted. The declared size is checked first
+    and the copy itself stops at the limit, since a crafted archive can
+    understate it.
+
+    Args:
+        source_path (str): The zip file.
+        output_path (str): Where to write the image.
+    """
+    limit = config.MAX_IMAGE_FILE_SIZE
+    with zipfile.ZipFile(source_path) as archive:
+        for member in archive.infolist():
+            if not member.is_dir() and member.filename.lower().endswith(ARCHIVE_IMAGE_EXTENSIONS):
+                if member.file_size > limit:
+                    raise RuntimeError(
+                        f'{member.filename} is {member.file_size} bytes (limit {limit})')
+                with archive.open(member) as src, open(output_path, 'wb') as dst:
+                    copied = 0
+                    while True:
+                        chunk = src.read(min(ARCHIVE_COPY_CHUNK, limit + 1 - copied))
+                        if not chunk:
+                            break
+                        copied += len(chunk)
+                        if copied > limit:
+                            raise RuntimeError(f'{member.filename} is over {limit} bytes')
+                        dst.write(chunk)
+                return
+    raise RuntimeError('archive contains no images')
+
+
+register_extractor('pdf', extract_pdf_first_page, tool='pdftoppm')
+register_extractor('mp4 mov m4v mkv webm avi', extract_video_frame, tool='ffmpeg')
+register_extractor('zip', extract_archive_image)
+
+
+def _run_extractor(extractor: PreviewExtractor, source_path: str, output_path: str) -> None:
+    """
+    Worker process entry point: applies the memory budget, then runs the extractor.
+
+    The worker leads its own process group so that a timeout also kills any
+    tools the extractor started. It exits with TRANSIENT_EXIT_CODE if the
+    extractor's tool is missing or timed out, and FAILED_EXIT_CODE on any
+    other error.
+
+    The worker's standard output is pointed at standard error, so that
+    neither it nor the tools it runs can write into a PDF streamed to stdout.
+    """
+    os.dup2(2, 1)
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    try:
+        import resource
+        budget = config.PREVIEW_MEMORY_BUDGET
+        resource.setrlimit(resource.RLIMIT_AS, (budget, budget))
+    except (ImportError, ValueError, OSError):
+        pass  # Memory limits are not available on this platform
+    try:
+        extractor(source_path, output_path)
+    except (ExtractorUnavailable, subprocess.TimeoutExpired) as e:
+        logger.warning("Preview extractor unavailable for %s: %s", os.path.basename(source_path), e)
+        raise SystemExit(TRANSIENT_EXIT_CODE)
+    except Exception as e:
+        logger.warning("Preview extractor error for %s: %s",
+                       os.path.basename(source_path), str(e) or type(e).__name__)
+        raise SystemExit(FAILED_EXIT_CODE)
+
+
+def _kill_worker(process: multiprocessing.Process) -> None:
+    """Kills a worker process together with any tools it started."""
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    process.kill()
+    process.join()
+
+
+def extract_preview(
+    source_path: str,
+    extension: str,
+    progress: Optional[Progress] = None
+) -> Optional[str]:
+    """
+    Returns a cached preview image of a non-image file, extracting it if needed.
+
+    Extraction runs in an isolated worker process limited to
+    config.PREVIEW_TIME_BUDGET seconds and config.PREVIEW_MEMORY_BUDGET bytes.
+    Files the extractor fails on are cached as failures, so a pathological
+    file costs at most one budget across editions. If the cache directory is
+    unusable, previews go to a temporary folder for the rest of the process. Failures that may not
+    recur (time budget overruns, missing tools, workers that fail to start)
+    are retried on the next run.
+
+    Workers are started with the 'spawn' method, which re-imports the main
+    module. If a worker cannot start (the program runs from stdin or a REPL,
+    or its main module is not guarded by `if __name__ == '__main__':`), no
+    further workers are started in this process and previews are skipped.
+
+    Args:
+        source_path (str): The file to preview.
+        extension (str): Its extension without the dot.
+        progress (Optional[Progress]): Cancelling it kills a running extraction.
+
+    Returns:
+        Optional[str]: Path of the preview image, or None if the file has no
+            extractor, the extractor's tool is not installed, or extraction
+            failed (the page is then text only).
+
+    Raises:
+        GenerationCancelled: If cancellation is requested through `progress`
+            while the extraction runs.
+    """
+    extractor = get_extractor(extension)
+    if extractor is None or not extractor_available(extractor) or _workers_broken:
+        return None
+
+    stat = os.stat(source_path)
+    key = cache_utils.make_key(
+        'preview', os.path.abspath(source_path), stat.st_mtime_ns, stat.st_size,
+        extractor.__module__, extractor.__name__, config.PREVIEW_MEMORY_BUDGET)
+    try:
+        preview_path = cache_utils.cache_path('previews', key, '.png')
+    except OSError as e:
+        cache_utils.warn_unavailable(e)
+        try:
+            preview_path = os.path.join(_fallback_preview_folder(), key + '.png')
+        except OSError:
+            return None
+    if os.path.exists(preview_path):
+        cache_utils.touch(preview_path)
+        return preview_path
+    if cache_utils.load_entry('previews', key) is not None:
+        return None  # Failed before; don't spend the budget again
+
+    tmp_path = f'{preview_path}.{os.getpid()}.{threading.get_ident()}.tmp.png'
+    process = multiprocessing.get_context('spawn').Process(
+        target=_run_extractor, args=(extractor, source_path, tmp_path), daemon=True)
+    try:
+        process.start()
+    except RuntimeError as e:
+        if getattr(multiprocessing.current_process(), '_inheriting', False):
+            # This is a worker still importing a main module that has no
+            # `if __name__ == '__main__'` guard: stop before it builds a booklet
+            logger.warning("Preview worker stopped: the main module must be guarded "
+                           "by `if __name__ == '__main__':`")
+            raise SystemExit(1)
+        logger.warning("No preview for %s: cannot start worker: %s", os.path.basename(source_path), e)
+        return None
+    except OSError as e:
+        logger.warning("No preview for %s: cannot start worker: %s", os.path.basename(source_path), e)
+        return None
+
+    # Wait in short steps so that a cancelled run stops promptly
+    deadline = time.monotonic() + config.PREVIEW_TIME_BUDGET
+    while process.is_alive() and time.monotonic() < deadline:
+        if progress is not None and progress.cancelled:
+            _kill_worker(process)
+            _remove_file(tmp_path)
+            progress.check()
+        process.join(CANCEL_POLL_INTERVAL)
+
+    cache_failure = False
+    if process.is_alive():
+        _kill_worker(process)
+        reason = f'exceeded {config.PREVIEW_TIME_BUDGET}s time budget'
+    elif process.exitcode == 0 and os.path.exists(tmp_path):
+        os.replace(tmp_path, preview_path)
+        return preview_path
+    elif process.exitcode == 1:
+        # The worker died before reaching the extractor, e.g. because the main
+        # module cannot be re-imported (stdin, REPL) or is unguarded
+        _disable_workers()
+        reason = 'worker failed to start'
+    else:
+        reason = f'extractor failed (exit code {process.exitcode})'
+        cache_failure = process.exitcode == FAILED_EXIT_CODE
+
+    _remove_file(tmp_path)
+    logger.warning("No preview for %s: %s", os.path.basename(source_path), reason)
+    if cache_failure:
+        cache_utils.store_entry('previews', key, {'failed': reason})
+    return None
+
+
+def _fallback_preview_folder() -> str:
+    """
+    Returns a temporary folder for previews when the cache is unusable. It is
+    created once per process and removed when the process exits.
+    """
+    global _fallback_folder
+    if _fallback_folder is None:
+        _fallback_folder = tempfile.mkdtemp(prefix='downloads_editions_previews_')
+        atexit.register(shutil.rmtree, _fallback_folder, True)
+    return _fallback_folder
+
+
+def _disable_workers() -> None:
+    """Stops starting preview workers for the rest of this process."""
+    global _workers_broken
+    if not _workers_broken:
+        _workers_broken = True
+        logger.warning("Preview workers cannot start, so non-image files get text-only "
+                       "pages. Run from a script file whose entry point is guarded by "
+                       "`if __name__ == '__main__':`.")
+
+
+def _remove_file(path: str) -> None:
+    """Removes a file if it exists."""
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Define a type alias for clarity
+ProgressEvent = Dict[str, Any]
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class GenerationCancelled(Exception):
+    """Raised when a booklet generation is cancelled before it completes."""
+
+
+class Progress:
+    """
+    Reports pipeline progress and carries the cancellation flag for a single run.
+
+    Every stage ('scan', 'pixelate', 'render') reports how many units are done out of
+    the total. Each call to `update` also checks for cancellation, so long loops stop
+    cooperatively at the next reported unit.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> None:
+        self.callback = callback
+        self.cancel_event = cancel_event or threading.Event()
+        self._stage_started: Dict[str, float] = {}
+
+    def cancel(self) -> None:
+        """Requests cancellation; the pipeline stops at its next progress check."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check(self) -> None:
+        """
+        Raises GenerationCancelled if cancellation has been requested.
+
+        Raises:
+            GenerationCancelled: If the cancel event is set.
+        """
+        if self.cancel_event.is_set():
+            raise GenerationCancelled('Generation cancelled')
+
+    def update(self, stage: str, done: int, total: int) -> None:
+        """
+        Emits a progress event for the given stage, then checks for cancellation.
+
+        Args:
+            stage (str): The pipeline stage name.
+            done (int): Number of units completed so far.
+            total (int): Total number of units in the stage (0 if unknown).
+        """
+        now = time.monotonic()
+        started = self._stage_started.setdefault(stage, now)
+        elapsed = now - started
+
+        if self.callback is not None:
+            rate = done / elapsed if elapsed > 0 else 0.0
+            eta = (total - done) / rate if rate > 0 and total >= done else None
+            self.callback({
+                'stage': stage,
+                'done': done,
+                'total': total,
+                'elapsed': elapsed,
+                'rate': rate,
+                'eta': eta
+            })
+
+        self.check()
+
+
+def format_event(event: ProgressEvent) -> str:
+    """
+    Formats a progress event as a short human-readable status line.
+
+    Args:
+        event (ProgressEvent): The event emitted by Progress.update.
+
+    Returns:
+        str: e.g. "Rendering sheets: 3/8 (2.1/s, ETA 2s)".
+    """
+    labels = {
+        'scan': 'Scanning files',
+        'pixelate': 'Pixelating images',
+        'render': 'Rendering sheets'
+    }
+    label = labels.get(event['stage'], event['stage'])
+    count = f"{event['done']}/{event['total']}" if event['total'] else str(event['done'])
+
+    details = []
+    if event['rate']:
+        details.append(f"{event['rate']:.1f}/s")
+    if event['eta'] is not None:
+        details.append(f"ETA {event['eta']:.0f}s")
+
+    return f"{label}: {count}" + (f" ({', '.join(details)})" if details else '')
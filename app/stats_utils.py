@@ -0,0 +1,105 @@
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app import config, file_utils
+
+logger = logging.getLogger(__name__)
+
+# Define a type alias for clarity
+FolderStats = Dict[str, Any]
+
+# Age percentiles reported, in percent
+AGE_PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def folder_stats(index: file_utils.FolderIndex, now: Optional[float] = None) -> FolderStats:
+    """
+    Computes summary statistics of an indexed folder in one vectorised pass.
+
+    The index columns (sizes, mtimes, extension codes) are copied into NumPy
+    arrays once; counts, byte totals and the type distribution come from
+    bincounts over the extension codes, and ages from a single percentile call.
+
+    Args:
+        index (FolderIndex): The scanned folder.
+        now (Optional[float]): Reference time for ages. Defaults to the current time.
+
+    Returns:
+        FolderStats: A JSON-serialisable dictionary with the keys
+            'folder', 'file_count', 'total_bytes', 'types' (per extension),
+            'classes' (per extension class), 'age_days' (percentiles),
+            'oldest' and 'newest' ({'name', 'date'} or None).
+    """
+    now = time.time() if now is None else now
+    sizes = np.array(index.sizes, dtype=np.int64)
+    mtimes = np.array(index.mtimes, dtype=np.float64)
+    codes = np.array(index.extension_codes, dtype=np.int64)
+    names = index.extension_names
+
+    stats: FolderStats = {
+        'folder': index.folder_path,
+        'file_count': int(sizes.size),
+        'total_bytes': int(sizes.sum()),
+        'types': {},
+        'classes': {},
+        'age_days': {},
+        'oldest': None,
+        'newest': None,
+    }
+    if not sizes.size:
+        return stats
+
+    # Type distribution: file count and bytes per extension code
+    counts = np.bincount(codes, minlength=len(names))
+    byte_totals = np.bincount(codes, weights=sizes, minlength=len(names))
+    for code in np.flatnonzero(counts):
+        stats['types'][names[code] or '(none)'] = {
+            'count': int(counts[code]), 'bytes': int(byte_totals[code])}
+
+    # Roll extensions up into classes through a code -> class lookup table
+    class_names = sorted(set(file_utils.EXTENSION_CLASSES) | {'other'})
+    class_of_code = np.array([class_names.index(file_utils.extension_class(name))
+                              for name in names], dtype=np.int64)
+    class_codes = class_of_code[codes]
+    class_counts = np.bincount(class_codes, minlength=len(class_names))
+    class_bytes = np.bincount(class_codes, weights=sizes, minlength=len(class_names))
+    for code in np.flatnonzero(class_counts):
+        stats['classes'][class_names[code]] = {
+            'count': int(class_counts[code]), 'bytes': int(class_bytes[code])}
+
+    # Age percentiles in days
+    ages = np.maximum(now - mtimes, 0) / config.SECONDS_PER_DAY
+    for percentile, age in zip(AGE_PERCENTILES, np.percentile(ages, AGE_PERCENTILES)):
+        stats['age_days'][f'p{percentile}'] = round(float(age), 2)
+
+    # Oldest and newest files
+    for key, row in (('oldest', int(mtimes.argmin())), ('newest', int(mtimes.argmax()))):
+        stats[key] = {
+            'name': os.path.basename(index.paths[row]),
+            'date': datetime.fromtimestamp(mtimes[row]).isoformat(timespec='seconds'),
+        }
+
+    return stats
+
+
+def load_folder_stats(folder_path: str) -> Optional[FolderStats]:
+    """
+    Scans a folder and returns its statistics.
+
+    Args:
+        folder_path (str): Path to the folder.
+
+    Returns:
+        Optional[FolderStats]: The statistics, or None if the folder cannot be read.
+    """
+    try:
+        index = file_utils.FolderIndex(folder_path)
+    except OSError as e:
+        logger.warning("Error reading folder '%s': %s", folder_path, e)
+        return None
+    return folder_stats(index)
@@ -0,0 +1,202 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, List, Optional, Set
+
+from app import config
+from app.file_utils import FolderIndex
+
+# inotify event flags (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# struct inotify_event header: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct('iIII')
+
+# Sentinel returned by a watcher when the whole folder must be rescanned
+RESCAN = None
+
+ChangeCallback = Callable[[FolderIndex], None]
+
+
+class InotifyWatcher:
+    """Reports the names of entries changed in a folder using Linux inotify."""
+
+    def __init__(self, folder_path: str) -> None:
+        """
+        Starts watching the folder.
+
+        Raises:
+            OSError: If inotify is unavailable or the watch cannot be added.
+        """
+        libc_name = ctypes.util.find_library('c')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available on this platform')
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder_path), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'cannot watch {folder_path}')
+
+    def read(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Waits up to `timeout` seconds for changes.
+
+        Returns:
+            Optional[Set[str]]: Names of changed entries (empty if none), or
+                RESCAN if events were lost and the folder must be rescanned.
+
+        Raises:
+            OSError: If the watched folder itself was deleted or moved.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names: Set[str] = set()
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return RESCAN
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                raise OSError('watched folder was removed or moved')
+            if name:
+                names.add(name)
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Fallback watcher for filesystems without inotify.
+
+    It only notices the folder's own mtime changing, which happens when entries
+    are created, deleted or renamed (not when a file is rewritten in place).
+    """
+
+    def __init__(self, folder_path: str) -> None:
+        self.folder_path = folder_path
+        self.mtime = os.stat(folder_path).st_mtime_ns
+
+    def read(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Sleeps up to `timeout` seconds, then checks the folder mtime.
+
+        Returns:
+            Optional[Set[str]]: An empty set if unchanged, otherwise RESCAN.
+        """
+        time.sleep(min(timeout, config.WATCH_POLL_INTERVAL))
+        mtime = os.stat(self.folder_path).st_mtime_ns
+        if mtime == self.mtime:
+            return set()
+        self.mtime = mtime
+        return RESCAN
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(folder_path: str):
+    """
+    Returns an inotify watcher for the folder, or a polling watcher if inotify
+    is not available.
+
+    Args:
+        folder_path (str): The folder to watch.
+    """
+    try:
+        return InotifyWatcher(folder_path)
+    except (OSError, AttributeError, TypeError) as e:
+        print(f"inotify unavailable ({e}); polling every {config.WATCH_POLL_INTERVAL}s instead")
+        return PollingWatcher(folder_path)
+
+
+def watch_folder(
+    folder_path: str,
+    on_change: ChangeCallback,
+    ignore_extensions: Optional[List[str]] = None,
+    debounce: Optional[float] = None,
+    stop_event: Optional[threading.Event] = None
+) -> None:
+    """
+    Keeps an in-memory index of a folder up to date and calls `on_change`
+    once changes have settled.
+
+    The callback runs once with the initial index, then again whenever changes
+    arrive and no further change follows within the debounce window. Each
+    changed entry is applied to the index as a delta; the folder is only
+    rescanned in full when events were lost or the polling fallback is in use.
+    The watch starts before the initial scan, so changes made during the scan
+    or the first callback are picked up too.
+
+    Args:
+        folder_path (str): The folder to watch.
+        on_change (ChangeCallback): Called with the updated FolderIndex.
+        ignore_extensions (Optional[List[str]]): Passed to FolderIndex.
+        debounce (Optional[float]): Quiet period in seconds before calling
+            on_change. Defaults to config.WATCH_DEBOUNCE.
+        stop_event (Optional[threading.Event]): Stops watching when set.
+    """
+    debounce = config.WATCH_DEBOUNCE if debounce is None else debounce
+    stop_event = stop_event or threading.Event()
+
+    watcher = open_watcher(folder_path)
+    pending: Set[str] = set()
+    rescan = False
+    last_event = 0.0
+    try:
+        index = FolderIndex(folder_path, ignore_extensions)
+        on_change(index)
+
+        while not stop_event.is_set():
+            changes = watcher.read(debounce if (pending or rescan) else 1.0)
+            if changes is RESCAN:
+                rescan = True
+                last_event = time.monotonic()
+            elif changes:
+                pending |= changes
+                last_event = time.monotonic()
+
+            if (pending or rescan) and time.monotonic() - last_event >= debounce:
+                if rescan:
+                    index = FolderIndex(folder_path, ignore_extensions)
+                else:
+                    for name in pending:
+                        index.refresh_file(name)
+                pending.clear()
+                rescan = False
+                on_change(index)
+    finally:
+        watcher.close()
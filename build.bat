@@ -10,7 +10,7 @@ echo.
 REM Check if Python is installed
 python --version >nul 2>&1
 if errorlevel 1 (
-    echo [ERROR] Python is not installed. Please install Python 3.6 or higher.
+    echo [ERROR] Python is not installed. Please install Python 3.8 or higher.
     exit /b 1
 )
 
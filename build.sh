@@ -31,7 +31,7 @@ print_error() {
 
 # Check if Python is installed
 if ! command -v python3 &> /dev/null; then
-    print_error "Python 3 is not installed. Please install Python 3.6 or higher."
+    print_error "Python 3 is not installed. Please install Python 3.8 or higher."
     exit 1
 fi
 
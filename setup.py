@@ -11,6 +11,7 @@ setup(
     url="https://github.com/alvinashiatey/downloads_editions",
     packages=find_packages(),
     install_requires=[
+        "numpy",
         "Pillow",
         "reportlab",
     ],
@@ -25,5 +26,5 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.8',
 )
@@ -0,0 +1,141 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from app import file_utils
+
+DAY = 86400
+
+
+def make_file(folder, name, size=0, age_days=0.0):
+    """Creates a file of the given size and age, returning its path."""
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as fh:
+        fh.write(b'x' * size)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def index_snapshot(index):
+    """Describes an index independently of its row order."""
+    rows = sorted(
+        (index.paths[row], index.sizes[row], index.mtimes[row], index.extensions[row])
+        for row in range(len(index)))
+    strata = {
+        strategy: {key: sorted(index.paths[row] for row in rows_) for key, rows_ in groups.items()}
+        for strategy, groups in index.strata.items()
+    }
+    assert sorted(index.rows.items()) == sorted(
+        (path, row) for row, path in enumerate(index.paths))
+    return rows, strata
+
+
+class FolderIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = self._tmp.name
+        self.rng = random.Random(1234)
+        extensions = ['jpg', 'png', 'pdf', 'txt', 'zip', 'mp4', 'csv', 'xyz', '']
+        for i in range(60):
+            ext = self.rng.choice(extensions)
+            name = f'file{i}.{ext}' if ext else f'file{i}'
+            make_file(self.folder, name, size=self.rng.choice([10, 2000, 200000]),
+                      age_days=self.rng.uniform(0, 400))
+        make_file(self.folder, 'desktop.ini')
+        os.mkdir(os.path.join(self.folder, 'subfolder'))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_scan_skips_ignored_files_and_folders(self):
+        index = file_utils.FolderIndex(self.folder)
+        self.assertEqual(len(index), 60)
+        self.assertFalse(any(path.endswith(('.ini', 'subfolder')) for path in index.paths))
+
+    def test_deltas_match_rescan(self):
+        index = file_utils.FolderIndex(self.folder)
+        names = sorted(os.listdir(self.folder))
+        for step in range(200):
+            action = self.rng.random()
+            if action < 0.4 and names:
+                name = self.rng.choice(names)
+                path = os.path.join(self.folder, name)
+                if os.path.isfile(path):
+                    os.remove(path)
+                    names.remove(name)
+            elif action < 0.7:
+                name = f'new{step}.{self.rng.choice(["jpg", "pdf", "mov", "ini"])}'
+                make_file(self.folder, name, size=self.rng.randrange(10 ** 6),
+                          age_days=self.rng.uniform(0, 400))
+                names.append(name)
+            elif names:
+                name = self.rng.choice(names)
+                if os.path.isfile(os.path.join(self.folder, name)):
+                    make_file(self.folder, name, size=self.rng.randrange(10 ** 6))
+            else:
+                continue
+            index.refresh_file(name)
+
+            if step % 20 == 0:
+                self.assertEqual(index_snapshot(index),
+                                 index_snapshot(file_utils.FolderIndex(self.folder)))
+        self.assertEqual(index_snapshot(index),
+                         index_snapshot(file_utils.FolderIndex(self.folder)))
+
+    def test_refresh_of_missing_file_is_a_no_op(self):
+        index = file_utils.FolderIndex(self.folder)
+        before = index_snapshot(index)
+        index.refresh_file('does-not-exist.jpg')
+        self.assertEqual(index_snapshot(index), before)
+
+    def test_sample_size_and_uniqueness(self):
+        index = file_utils.FolderIndex(self.folder)
+        for strategy in file_utils.SAMPLING_STRATEGIES:
+            for k in (0, 1, 7, 59, 60, 61, 500):
+                with self.subTest(strategy=strategy, k=k):
+                    sample = index.sample(k, strategy, rng=random.Random(k))
+                    self.assertEqual(len(sample), min(k, len(index)))
+                    self.assertEqual(len(set(sample)), len(sample))
+                    self.assertTrue(set(sample) <= set(index.paths))
+
+    def test_sample_of_empty_folder(self):
+        with tempfile.TemporaryDirectory() as empty:
+            index = file_utils.FolderIndex(empty)
+            for strategy in file_utils.SAMPLING_STRATEGIES:
+                self.assertEqual(index.sample(5, strategy), [])
+
+    def test_stratified_sample_is_proportional(self):
+        index = file_utils.FolderIndex(self.folder)
+        histogram = index.histogram('extension')
+        k = 30
+        sample = index.sample(k, 'extension', rng=random.Random(7))
+        counts = {}
+        for path in sample:
+            key = file_utils.extension_class(os.path.splitext(path)[1][1:].lower())
+            counts[key] = counts.get(key, 0) + 1
+        for key, size in histogram.items():
+            quota = k * size / len(index)
+            self.assertLessEqual(abs(counts.get(key, 0) - quota), 1, key)
+
+    def test_recent_sample_favours_new_files(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for i in range(50):
+                make_file(folder, f'new{i}.txt', age_days=1)
+                make_file(folder, f'old{i}.txt', age_days=365)
+            index = file_utils.FolderIndex(folder)
+            sample = index.sample(20, 'recent', rng=random.Random(3))
+            recent = sum(os.path.basename(path).startswith('new') for path in sample)
+            self.assertGreaterEqual(recent, 18)
+
+    def test_unknown_strategy(self):
+        index = file_utils.FolderIndex(self.folder)
+        with self.assertRaises(ValueError):
+            index.sample(3, 'alphabetical')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+from PIL import Image
+
+from app import config, image_utils
+
+
+class OpenGuardedTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def make_image(self, name, size, image_format):
+        path = os.path.join(self._tmp.name, name)
+        Image.new('RGB', size, 'red').save(path, format=image_format)
+        return path
+
+    def test_reduced_decode_of_large_jpeg(self):
+        path = self.make_image('large.jpg', (4000, 2000), 'JPEG')
+        with mock.patch.object(config, 'MAX_IMAGE_PIXELS', 1_000_000):
+            img, original_size = image_utils.open_guarded(path, 8)
+        with img:
+            self.assertEqual(original_size, (4000, 2000))
+            self.assertEqual(img.size, (500, 250))
+
+    def test_large_image_without_reduced_decode_is_skipped(self):
+        path = self.make_image('large.png', (4000, 2000), 'PNG')
+        with mock.patch.object(config, 'MAX_IMAGE_PIXELS', 1_000_000):
+            with self.assertRaises(image_utils.ImageSkipped):
+                image_utils.open_guarded(path, 8)
+
+    def test_pillow_limit_is_kept(self):
+        path = self.make_image('bomb.png', (100, 100), 'PNG')
+        seen_limits = []
+        real_open = Image.open
+
+        def spy_open(*args, **kwargs):
+            seen_limits.append(Image.MAX_IMAGE_PIXELS)
+            return real_open(*args, **kwargs)
+
+        # 10,000 pixels is over twice the limit: DecompressionBombError
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000), \
+                mock.patch.object(Image, 'open', spy_open):
+            with self.assertRaises(image_utils.ImageSkipped):
+                image_utils.open_guarded(path, 1)
+        self.assertEqual(seen_limits, [1000])
+
+    def test_pillow_warning_as_error_is_skipped(self):
+        path = self.make_image('warn.png', (40, 40), 'PNG')
+        # 1,600 pixels is over the limit, but not twice over: a warning
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000):
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', Image.DecompressionBombWarning)
+                with self.assertRaises(image_utils.ImageSkipped):
+                    image_utils.open_guarded(path, 1)
+
+    def test_corrupt_image_is_skipped(self):
+        path = os.path.join(self._tmp.name, 'corrupt.png')
+        with open(path, 'wb') as fh:
+            fh.write(b'not an image')
+        with self.assertRaises(image_utils.ImageSkipped):
+            image_utils.open_guarded(path, 1)
+
+
+class PixelateProfileTest(unittest.TestCase):
+
+    def test_output_follows_profile(self):
+        with tempfile.TemporaryDirectory() as folder:
+            source_path = os.path.join(folder, 'source.jpg')
+            blocks = Image.frombytes('RGB', (60, 30), os.urandom(60 * 30 * 3))
+            blocks.resize((3000, 1500), Image.NEAREST).save(source_path, format='JPEG')
+
+            for name, profile in config.OUTPUT_PROFILES.items():
+                with self.subTest(profile=name):
+                    output_path = os.path.join(folder, name)
+                    image_utils.pixelate_image(
+                        source_path, output_path, config.BuildConfig(output_profile=name))
+
+                    with Image.open(output_path) as img:
+                        self.assertEqual(img.format, profile['image_format'])
+                        size = profile['max_image_size']
+                        self.assertEqual(img.size, (size, size // 2))
+                        if profile['image_format'] == 'JPEG':
+                            # Same quantization tables as a save at the profile's quality
+                            reference_path = os.path.join(folder, name + '.reference')
+                            img.save(reference_path, format='JPEG', quality=profile['jpeg_quality'])
+                            with Image.open(reference_path) as reference:
+                                self.assertEqual(img.quantization, reference.quantization)
+                        elif profile['palette_colors']:
+                            self.assertEqual(img.mode, 'P')
+                            self.assertLessEqual(len(img.getcolors()), profile['palette_colors'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from app import file_utils
+from app.main import refresh_selection
+
+
+class RefreshSelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = self._tmp.name
+        for i in range(20):
+            self.touch(f'file{i}.txt')
+        self.index = file_utils.FolderIndex(self.folder)
+        random.seed(42)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def touch(self, name):
+        open(os.path.join(self.folder, name), 'w').close()
+
+    def remove(self, name):
+        os.remove(os.path.join(self.folder, name))
+        self.index.refresh_file(name)
+
+    def test_initial_selection(self):
+        selection = refresh_selection([], self.index, 8, 'uniform')
+        self.assertEqual(len(selection), 8)
+        self.assertEqual(len(set(selection)), 8)
+
+    def test_unchanged_folder_keeps_selection(self):
+        selection = refresh_selection([], self.index, 8, 'uniform')
+        self.assertEqual(refresh_selection(selection, self.index, 8, 'uniform'), selection)
+
+    def test_surviving_files_keep_their_slots(self):
+        selection = refresh_selection([], self.index, 8, 'uniform')
+        deleted = {selection[1], selection[5]}
+        for path in deleted:
+            self.remove(os.path.basename(path))
+
+        refreshed = refresh_selection(selection, self.index, 8, 'uniform')
+
+        self.assertEqual(len(refreshed), 8)
+        self.assertEqual(len(set(refreshed)), 8)
+        for slot, path in enumerate(selection):
+            if path in deleted:
+                self.assertNotIn(refreshed[slot], selection)
+                self.assertIn(refreshed[slot], self.index.rows)
+            else:
+                self.assertEqual(refreshed[slot], path)
+
+    def test_shrinking_folder(self):
+        selection = refresh_selection([], self.index, 8, 'uniform')
+        for i in range(20):
+            path = os.path.join(self.folder, f'file{i}.txt')
+            if path not in selection[:3]:
+                self.remove(f'file{i}.txt')
+
+        refreshed = refresh_selection(selection, self.index, 8, 'uniform')
+
+        self.assertEqual(refreshed, selection[:3])
+
+    def test_growing_selection(self):
+        selection = refresh_selection([], self.index, 5, 'uniform')
+        refreshed = refresh_selection(selection, self.index, 9, 'uniform')
+        self.assertEqual(refreshed[:5], selection)
+        self.assertEqual(len(set(refreshed)), 9)
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CommandLineTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self._tmp.name, 'downloads')
+        os.mkdir(self.folder)
+        for i in range(5):
+            with open(os.path.join(self.folder, f'file{i}.txt'), 'w') as fh:
+                fh.write('x' * i)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def run_main(self, *args):
+        env = dict(os.environ)
+        # Keep the cache out of the real home folder
+        env['HOME'] = env['USERPROFILE'] = self._tmp.name
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+        return subprocess.run([sys.executable, '-m', 'app.main', *args],
+                              cwd=self._tmp.name, env=env, capture_output=True)
+
+    def test_stream_to_stdout(self):
+        result = self.run_main('--folder', self.folder, '--files', '3', '-o', '-')
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertTrue(result.stdout.startswith(b'%PDF-'))
+        self.assertTrue(result.stdout.rstrip().endswith(b'%%EOF'))
+        self.assertEqual(result.stdout.count(b'%%EOF'), 1)
+        self.assertIn(b'Booklet PDF generated', result.stderr)
+
+    def test_write_to_file(self):
+        output_path = os.path.join(self._tmp.name, 'booklet.pdf')
+        result = self.run_main('--folder', self.folder, '-o', output_path, '--no-open')
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, b'')
+        with open(output_path, 'rb') as fh:
+            self.assertTrue(fh.read().startswith(b'%PDF-'))
+
+    def test_stats(self):
+        result = self.run_main('--folder', self.folder, '--stats')
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout)['file_count'], 5)
+
+    def test_failures_exit_non_zero(self):
+        empty = os.path.join(self._tmp.name, 'empty')
+        os.mkdir(empty)
+        missing = os.path.join(self._tmp.name, 'missing')
+        unwritable = os.path.join(missing, 'booklet.pdf')
+        for name, args in [
+            ('missing folder', ['--folder', missing, '--no-open']),
+            ('missing folder to stdout', ['--folder', missing, '-o', '-']),
+            ('empty folder', ['--folder', empty, '--no-open']),
+            ('unwritable output', ['--folder', self.folder, '-o', unwritable, '--no-open']),
+        ]:
+            with self.subTest(name):
+                result = self.run_main(*args)
+                self.assertEqual(result.returncode, 1, result.stderr)
+                if '-' in args:
+                    self.assertEqual(result.stdout, b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
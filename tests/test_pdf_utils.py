@@ -0,0 +1,342 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from PIL import Image
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+
+from app import config, pdf_utils, preview_utils
+from app.progress import GenerationCancelled, Progress
+
+
+def make_files(folder, count):
+    """Creates `count` small text files, returning their paths."""
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f'file{i}.txt')
+        with open(path, 'w') as fh:
+            fh.write('x' * (i + 1))
+        paths.append(path)
+    return paths
+
+
+def make_image(path, size=(3000, 1500)):
+    """Saves a JPEG of random colour blocks, returning its path."""
+    blocks = Image.frombytes('RGB', (60, 30), os.urandom(60 * 30 * 3))
+    blocks.resize(size, Image.NEAREST).save(path, format='JPEG', quality=90)
+    return path
+
+
+def pdf_objects(data, kind):
+    """Returns the headers (the part before the stream) of the objects of a kind."""
+    return [
+        match.group(1).split(b'stream', 1)[0]
+        for match in pdf_utils.PDF_OBJECT_RE.finditer(data)
+        if pdf_utils.classify_pdf_object(match.group(1)) == kind
+    ]
+
+
+def hanging_extractor(source_path, output_path):
+    """Preview extractor that never finishes. It starts a child process and
+    writes both process IDs to `source_path`.pids."""
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    with open(source_path + '.tmp', 'w') as fh:
+        fh.write(f'{os.getpid()} {child.pid}')
+    os.replace(source_path + '.tmp', source_path + '.pids')
+    child.wait()
+
+
+def process_exists(pid):
+    """Whether a process is running (zombies count as gone)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    try:
+        with open(f'/proc/{pid}/stat') as fh:
+            return fh.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return True
+
+
+class BuildTestCase(unittest.TestCase):
+    """Builds booklets from a temporary folder into a temporary cache."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self._tmp.name, 'downloads')
+        os.mkdir(self.folder)
+        self.files = make_files(self.folder, 6)
+        self.stats = {'file_count': len(self.files), 'newest': None}
+        patches = [
+            mock.patch.object(config, 'CACHE_DIR', os.path.join(self._tmp.name, 'cache')),
+            # Fixed dates and document IDs, so equal drawings give equal bytes
+            mock.patch.object(rl_config, 'invariant', 1),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def builder(self, **settings):
+        settings.setdefault('downloads_folder', self.folder)
+        settings.setdefault('user_name', 'tester')
+        return pdf_utils.BookletBuilder(config.BuildConfig(**settings))
+
+    def render(self, **settings):
+        return self.builder(**settings).render(self.files, stats=self.stats)
+
+
+class PageCacheTest(BuildTestCase):
+
+    def test_warm_build_matches_cold_build(self):
+        uncached = self.render(use_page_cache=False)
+        cold = self.render()
+
+        with mock.patch.object(pdf_utils, 'draw_title', wraps=pdf_utils.draw_title) as draw_title:
+            warm = self.render()
+
+        draw_title.assert_not_called()  # every content page came from the cache
+        self.assertEqual(warm, cold)
+        self.assertEqual(cold, uncached)
+
+    def capture(self, c, builder, page_num=1):
+        file_info = pdf_utils.prepare_file_infos(self.files[:1])[0]
+        start = len(c._code)
+        pdf_utils.draw_page_content(c, file_info, page_num, builder)
+        return pdf_utils.capture_page(c, start)
+
+    def save(self, c):
+        c.showPage()
+        c.save()
+        return c._filename.getvalue()
+
+    def test_splice_registers_fonts_in_fresh_canvas(self):
+        builder = self.builder(use_page_cache=False)
+        # A font the canvas does not register by itself
+        builder.title_style.fontName = 'Times-Roman'
+
+        drawn = canvas.Canvas(io.BytesIO())
+        entry = self.capture(drawn, builder)
+        self.assertEqual(entry['fonts'], {'Times-Roman': '/F2'})
+
+        spliced = canvas.Canvas(io.BytesIO())
+        self.assertTrue(pdf_utils.splice_cached_page(spliced, entry))
+
+        spliced_pdf = self.save(spliced)
+        self.assertIn(b'/BaseFont /Times-Roman', spliced_pdf)
+        self.assertEqual(spliced_pdf, self.save(drawn))
+
+    def test_splice_refused_when_font_names_differ(self):
+        builder = self.builder(use_page_cache=False)
+        builder.title_style.fontName = 'Times-Roman'
+        entry = self.capture(canvas.Canvas(io.BytesIO()), builder)
+
+        # Courier takes /F2, which the entry uses for Times-Roman
+        c = canvas.Canvas(io.BytesIO())
+        c.setFont('Courier', 12)
+        code = list(c._code)
+
+        self.assertFalse(pdf_utils.splice_cached_page(c, entry))
+        self.assertEqual(c._code, code)
+
+
+
+class OutputProfileTest(BuildTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Two identical images: shared resources embed them once
+        self.images = [make_image(os.path.join(self.folder, 'a.jpg'))]
+        self.images.append(os.path.join(self.folder, 'b.jpg'))
+        with open(self.images[0], 'rb') as src, open(self.images[1], 'wb') as dst:
+            dst.write(src.read())
+
+    def render_images(self, profile_name):
+        return self.builder(draw_images=True, use_page_cache=False,
+                            output_profile=profile_name).render(self.images, stats=self.stats)
+
+    def test_profiles_set_compression_encoding_size_and_sharing(self):
+        for name, profile in config.OUTPUT_PROFILES.items():
+            with self.subTest(profile=name):
+                data = self.render_images(name)
+                size = profile['max_image_size']
+
+                for header in pdf_objects(data, 'content'):
+                    self.assertEqual(b'/FlateDecode' in header, bool(profile['page_compression']))
+
+                images = pdf_objects(data, 'image')
+                if profile['share_resources']:
+                    self.assertEqual(len(images), 1)
+                    self.assertRegex(images[0], rb'/Width %d\s' % size)
+                    self.assertRegex(images[0], rb'/Height %d\s' % (size // 2))
+                    encoding = b'/DCTDecode' if profile['image_format'] == 'JPEG' else b'/FlateDecode'
+                    self.assertIn(encoding, images[0])
+                else:
+                    self.assertEqual(images, [])
+                    self.assertEqual(data.count(b'BI /W %d /H %d ' % (size, size // 2)), 2)
+
+    def test_report_matches_output(self):
+        output_path = os.path.join(self._tmp.name, 'booklet.pdf')
+        for name in config.OUTPUT_PROFILES:
+            with self.subTest(profile=name):
+                report = self.builder(draw_images=True, output_profile=name).build(
+                    self.images, stats=self.stats, open_viewer=False, output=output_path)
+                with open(output_path, 'rb') as fh:
+                    data = fh.read()
+
+                self.assertEqual(report['profile'], name)
+                self.assertEqual(report['total_bytes'], len(data))
+                self.assertEqual(sum(report['bytes_by_type'].values()), len(data))
+                self.assertEqual(report['bytes_by_type'], pdf_utils.measure_pdf(data))
+                image_bytes = report['bytes_by_type'].get('image', 0)
+                if config.OUTPUT_PROFILES[name]['share_resources']:
+                    self.assertGreater(image_bytes, 0)
+                else:
+                    self.assertEqual(image_bytes, 0)  # inline images are page content
+                self.assertGreaterEqual(report['render_seconds'], 0)
+                self.assertGreaterEqual(report['encode_seconds'], 0)
+
+    def test_measure_pdf(self):
+        data = (b'%PDF-1.4\n'
+                b'1 0 obj\n<< /Type /Font /BaseFont /Helvetica >>\nendobj\n'
+                b'2 0 obj\n<< /Subtype /Image /Length 4 >>\nstream\nabcd\nendstream\nendobj\n'
+                b'trailer\n%%EOF\n')
+        font = b'1 0 obj\n<< /Type /Font /BaseFont /Helvetica >>\nendobj'
+        image = b'2 0 obj\n<< /Subtype /Image /Length 4 >>\nstream\nabcd\nendstream\nendobj'
+        self.assertEqual(pdf_utils.measure_pdf(data), {
+            'font': len(font),
+            'image': len(image),
+            'structure': len(data) - len(font) - len(image),
+        })
+
+
+class RenderBookletTest(BuildTestCase):
+
+    def test_file_object_and_bytes(self):
+        stream = io.BytesIO()
+        self.assertIsNone(self.builder().render(self.files, stream, stats=self.stats))
+
+        data = self.render()
+        self.assertTrue(data.startswith(b'%PDF-'))
+        self.assertEqual(stream.getvalue(), data)
+
+    def test_does_not_write_default_output_path(self):
+        default_path = os.path.join(self._tmp.name, 'default.pdf')
+        self.builder(output_path=default_path).render(self.files, stats=self.stats)
+        self.assertFalse(os.path.exists(default_path))
+
+    def test_stats_default_to_the_files_folder(self):
+        elsewhere = os.path.join(self._tmp.name, 'elsewhere')
+        stdout = io.StringIO()
+        with mock.patch.object(pdf_utils.stats_utils, 'load_folder_stats',
+                               wraps=pdf_utils.stats_utils.load_folder_stats) as load_stats, \
+                contextlib.redirect_stdout(stdout):
+            self.builder(downloads_folder=elsewhere).render(self.files)
+            load_stats.assert_called_once_with(self.folder)
+
+            # Files from several folders: no folder to describe
+            load_stats.reset_mock()
+            self.builder(downloads_folder=elsewhere).render(self.files + [__file__])
+            load_stats.assert_not_called()
+
+            # An unreadable folder is logged, not printed
+            pdf_utils.stats_utils.load_folder_stats(elsewhere)
+        self.assertEqual(stdout.getvalue(), '')
+
+
+class ConcurrentBuildTest(BuildTestCase):
+
+    def test_concurrent_builds_match_sequential_builds(self):
+        images = [make_image(os.path.join(self.folder, f'image{i}.jpg'), (800, 400))
+                  for i in range(3)]
+        files = self.files[:3] + images
+        settings = [
+            {'output_profile': 'fast-preview', 'draw_images': True, 'pixel_size': 20},
+            {'output_profile': 'print', 'draw_images': True, 'use_page_cache': False},
+            {'output_profile': 'archive', 'draw_images': True, 'margin': 30},
+            {'output_profile': 'print', 'draw_images': False, 'title_text_length': 5,
+             'user_name': 'other'},
+        ]
+
+        def render(index):
+            return self.builder(**settings[index]).render(files, stats=self.stats)
+
+        sequential = [render(index) for index in range(len(settings))]
+        self.assertEqual(len(set(sequential)), len(settings))  # the settings matter
+
+        jobs = list(range(len(settings))) * 3
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            concurrent = list(pool.map(render, jobs))
+        for index, data in zip(jobs, concurrent):
+            self.assertEqual(data, sequential[index], settings[index])
+
+
+class CancellationTest(BuildTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.output_path = os.path.join(self._tmp.name, 'booklet.pdf')
+
+    def test_cancel_between_sheets(self):
+        def cancel_after_first_sheet(event):
+            if event['stage'] == 'render' and event['done'] == 1:
+                progress.cancel()
+
+        progress = Progress(cancel_after_first_sheet)
+        with self.assertRaises(GenerationCancelled):
+            self.builder().build(self.files, progress, self.stats,
+                                 open_viewer=False, output=self.output_path)
+        self.assertFalse(os.path.exists(self.output_path))
+
+    @unittest.skipUnless(hasattr(os, 'killpg'), 'needs POSIX process groups')
+    def test_cancel_kills_running_preview_worker(self):
+        preview_utils.register_extractor('hang', hanging_extractor)
+        self.addCleanup(preview_utils.EXTRACTORS.pop, 'hang')
+        source_path = os.path.join(self.folder, 'stuck.hang')
+        open(source_path, 'w').close()
+        pids_path = source_path + '.pids'
+
+        progress = Progress()
+
+        def cancel_once_extracting():
+            deadline = time.monotonic() + config.PREVIEW_TIME_BUDGET
+            while not os.path.exists(pids_path) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            progress.cancel()
+
+        canceller = threading.Thread(target=cancel_once_extracting)
+        canceller.start()
+        started = time.monotonic()
+        try:
+            with self.assertRaises(GenerationCancelled):
+                self.builder(draw_images=True).build(
+                    [source_path], progress, self.stats,
+                    open_viewer=False, output=self.output_path)
+        finally:
+            canceller.join()
+
+        self.assertLess(time.monotonic() - started, config.PREVIEW_TIME_BUDGET)
+        self.assertFalse(os.path.exists(self.output_path))
+        with open(pids_path) as fh:
+            worker_pid, tool_pid = map(int, fh.read().split())
+        deadline = time.monotonic() + 5
+        while (process_exists(worker_pid) or process_exists(tool_pid)) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(process_exists(worker_pid))
+        self.assertFalse(process_exists(tool_pid))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import time
+import unittest
+
+from app import file_utils, stats_utils
+
+DAY = 86400
+
+
+class FolderStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = self._tmp.name
+        self.now = time.time()
+        # name, size, age in days
+        for name, size, age in [
+            ('a.jpg', 100, 1),
+            ('b.JPG', 300, 2),
+            ('c.pdf', 1000, 3),
+            ('d.zip', 50, 4),
+            ('README', 7, 5),
+        ]:
+            path = os.path.join(self.folder, name)
+            with open(path, 'wb') as fh:
+                fh.write(b'x' * size)
+            os.utime(path, (self.now - age * DAY, self.now - age * DAY))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_known_folder(self):
+        stats = stats_utils.folder_stats(file_utils.FolderIndex(self.folder), now=self.now)
+
+        self.assertEqual(stats['folder'], self.folder)
+        self.assertEqual(stats['file_count'], 5)
+        self.assertEqual(stats['total_bytes'], 1457)
+        self.assertEqual(stats['types'], {
+            'jpg': {'count': 2, 'bytes': 400},
+            'pdf': {'count': 1, 'bytes': 1000},
+            'zip': {'count': 1, 'bytes': 50},
+            '(none)': {'count': 1, 'bytes': 7},
+        })
+        self.assertEqual(stats['classes'], {
+            'image': {'count': 2, 'bytes': 400},
+            'document': {'count': 1, 'bytes': 1000},
+            'archive': {'count': 1, 'bytes': 50},
+            'other': {'count': 1, 'bytes': 7},
+        })
+        self.assertEqual(stats['age_days']['p50'], 3.0)
+        self.assertEqual(stats['age_days']['p10'], 1.4)
+        self.assertEqual(stats['oldest']['name'], 'README')
+        self.assertEqual(stats['newest']['name'], 'a.jpg')
+
+    def test_stats_follow_index_deltas(self):
+        index = file_utils.FolderIndex(self.folder)
+        os.remove(os.path.join(self.folder, 'c.pdf'))
+        index.refresh_file('c.pdf')
+        stats = stats_utils.folder_stats(index, now=self.now)
+
+        self.assertEqual(stats['file_count'], 4)
+        self.assertEqual(stats['total_bytes'], 457)
+        self.assertNotIn('pdf', stats['types'])
+        self.assertNotIn('document', stats['classes'])
+
+    def test_empty_folder(self):
+        with tempfile.TemporaryDirectory() as empty:
+            stats = stats_utils.folder_stats(file_utils.FolderIndex(empty))
+        self.assertEqual(stats['file_count'], 0)
+        self.assertEqual(stats['total_bytes'], 0)
+        self.assertIsNone(stats['oldest'])
+        self.assertEqual(stats['age_days'], {})
+
+    def test_unreadable_folder(self):
+        self.assertIsNone(stats_utils.load_folder_stats(os.path.join(self.folder, 'missing')))
+
+
+if __name__ == '__main__':
+    unittest.main()
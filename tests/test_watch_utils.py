@@ -0,0 +1,40 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from app import watch_utils
+
+
+class WatchFolderTest(unittest.TestCase):
+
+    def test_change_during_first_callback_is_picked_up(self):
+        with tempfile.TemporaryDirectory() as folder:
+            open(os.path.join(folder, 'a.txt'), 'w').close()
+            new_path = os.path.join(folder, 'b.txt')
+            stop = threading.Event()
+            seen = []
+
+            def on_change(index):
+                seen.append(sorted(index.paths))
+                if len(seen) == 1:
+                    # Simulates a file arriving while the first build runs
+                    open(new_path, 'w').close()
+                elif new_path in index.paths:
+                    stop.set()
+
+            thread = threading.Thread(
+                target=watch_utils.watch_folder,
+                args=(folder, on_change),
+                kwargs={'debounce': 0.1, 'stop_event': stop},
+                daemon=True)
+            thread.start()
+            stop.wait(10)
+            stop.set()
+            thread.join(10)
+
+            self.assertIn(new_path, seen[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Measures how quickly the CLI and GUI start, so that import-time regressions
+are caught.
+
+Three checks are run, each in fresh interpreters:
+
+- Importing app.main and app.gui must not load ReportLab, Pillow or NumPy.
+- `python -m app.main --help` must finish within the help budget.
+- The GUI's first window must be drawn within the window budget (skipped
+  when no display is available).
+
+The median of several runs is compared against each budget.
+
+Usage:
+    python tools/measure_startup.py [--runs N] [--help-budget S] [--window-budget S]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load once there is a booklet to build
+HEAVY_MODULES = ['reportlab', 'PIL', 'numpy']
+
+# Keep in sync with app.gui (not imported here, so Tk is not needed to run the CLI checks)
+STARTUP_PROBE_ENV = 'DOWNLOADS_EDITIONS_STARTUP_PROBE'
+STARTUP_PROBE_MARKER = 'first-window'
+
+
+def child_env() -> dict:
+    """Environment for child interpreters, with the repository importable."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return env
+
+
+def heavy_imports(module: str) -> List[str]:
+    """
+    Returns the heavy modules that importing `module` loads.
+
+    Args:
+        module (str): The module to import, e.g. 'app.main'.
+
+    Returns:
+        List[str]: The names from HEAVY_MODULES found in sys.modules.
+    """
+    code = (f'import sys, {module}; '
+            f'print(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))')
+    result = subprocess.run([sys.executable, '-c', code], env=child_env(),
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def time_help() -> float:
+    """Returns the seconds taken by `python -m app.main --help`."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'app.main', '--help'], env=child_env(),
+                   stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - started
+
+
+def time_first_window(timeout: float) -> Optional[float]:
+    """
+    Returns the seconds until the GUI reports its first window, or None if
+    the GUI could not start (e.g. there is no display).
+
+    Args:
+        timeout (float): Seconds to wait before giving up.
+    """
+    env = child_env()
+    env[STARTUP_PROBE_ENV] = '1'
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'app.gui'], env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    # Kill a hung GUI so that reading its output ends
+    watchdog = threading.Timer(timeout, process.kill)
+    watchdog.start()
+    try:
+        for line in process.stdout:
+            if line.strip() == STARTUP_PROBE_MARKER:
+                return time.perf_counter() - started
+        return None
+    finally:
+        watchdog.cancel()
+        process.kill()
+        process.wait()
+
+
+def has_display() -> bool:
+    """Whether a GUI window can be opened on this machine."""
+    return sys.platform in ('darwin', 'win32') or bool(
+        os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Runs per measurement (default: %(default)s)')
+    parser.add_argument('--help-budget', type=float, default=1.0,
+                        help='Median seconds allowed for --help (default: %(default)s)')
+    parser.add_argument('--window-budget', type=float, default=2.0,
+                        help='Median seconds allowed until the first window (default: %(default)s)')
+    args = parser.parse_args()
+
+    failures = []
+
+    for module in ('app.main', 'app.gui'):
+        try:
+            loaded = heavy_imports(module)
+        except subprocess.CalledProcessError as e:
+            if module == 'app.gui' and 'tkinter' in e.stderr:
+                print(f'{module}: skipped (tkinter is not installed)')
+                continue
+            raise
+        print(f'{module}: imports {", ".join(loaded) if loaded else "no heavy modules"}')
+        if loaded:
+            failures.append(f'importing {module} loads {", ".join(loaded)}')
+
+    help_time = statistics.median(time_help() for _ in range(args.runs))
+    print(f'--help: {help_time * 1000:.0f} ms (budget {args.help_budget * 1000:.0f} ms)')
+    if help_time > args.help_budget:
+        failures.append('--help is over budget')
+
+    if has_display():
+        window_times = [time_first_window(args.window_budget * 5) for _ in range(args.runs)]
+        if None in window_times:
+            failures.append('the GUI did not report its first window')
+        else:
+            window_time = statistics.median(window_times)
+            print(f'first window: {window_time * 1000:.0f} ms '
+                  f'(budget {args.window_budget * 1000:.0f} ms)')
+            if window_time > args.window_budget:
+                failures.append('the first window is over budget')
+    else:
+        print('first window: skipped (no display)')
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())